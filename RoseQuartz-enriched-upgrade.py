@@ -1,5 +1,9 @@
+import bisect
 import math
-from typing import List, Optional
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
 
 # --- Physical Constants ---
 PLANCK = 6.62607015e-34        # Planck constant (J·s)
@@ -17,29 +21,181 @@ DOPANT_LAYERS = [
 # --- Tuning Parameters ---
 DEFAULT_TOLERANCE = 0.2
 VOLTAGE_EFFECT = 0.04  # Wavelength shift per voltage mismatch
+PV_TPV_CUTOFF_NM = 700  # Emissions below go to PV, at/above to TPV
+RECYCLE_FRACTION = 0.4  # Share of amplified photons fed back
+INCREMENTAL_RESYNC_CYCLES = 1024  # Incremental PV/TPV totals are re-summed this often
 
 # --- Wavelength to Visible Color (approx.) ---
+# Color names indexed by the ``color_index`` field of batch excitations
+COLOR_NAMES = ("Violet", "Blue", "Green", "Yellow", "Orange", "Red", "Infrared/Out of visible")
+OUT_OF_VISIBLE = len(COLOR_NAMES) - 1
+
+# Lower edge (nm) of each visible band; a band runs up to the next edge,
+# and Red ends at VISIBLE_MAX_NM inclusive. Fractional wavelengths between
+# the old integer bands (e.g. 450.5 nm) now land in the lower band.
+COLOR_BAND_EDGES_NM = (380, 451, 496, 571, 591, 621)
+VISIBLE_MAX_NM = 750
+
 def wavelength_to_color(wavelength_nm: float) -> str:
-    if 380 <= wavelength_nm <= 450:
-        return "Violet"
-    elif 451 <= wavelength_nm <= 495:
-        return "Blue"
-    elif 496 <= wavelength_nm <= 570:
-        return "Green"
-    elif 571 <= wavelength_nm <= 590:
-        return "Yellow"
-    elif 591 <= wavelength_nm <= 620:
-        return "Orange"
-    elif 621 <= wavelength_nm <= 750:
-        return "Red"
-    return "Infrared/Out of visible"
+    if not (COLOR_BAND_EDGES_NM[0] <= wavelength_nm <= VISIBLE_MAX_NM):
+        return COLOR_NAMES[OUT_OF_VISIBLE]
+    return COLOR_NAMES[bisect.bisect_right(COLOR_BAND_EDGES_NM, wavelength_nm) - 1]
+
+def wavelength_to_color_index(wavelength_nm: np.ndarray) -> np.ndarray:
+    """Vectorized ``wavelength_to_color``, returning indices into ``COLOR_NAMES``."""
+    wl = np.asarray(wavelength_nm, dtype=np.float64)
+    index = np.searchsorted(COLOR_BAND_EDGES_NM, wl, side="right") - 1
+    visible = (wl >= COLOR_BAND_EDGES_NM[0]) & (wl <= VISIBLE_MAX_NM)
+    return np.where(visible, index, OUT_OF_VISIBLE).astype(np.int8)
+
+# --- Dopant Spectrum Lookup ---
+class DopantSpectrumIndex:
+    """
+    Interval index over dopant ``spectrum_nm`` ranges (inclusive).
+    Endpoints split the axis into points and open gaps; the dopants covering
+    each piece are precomputed, so a lookup is one bisect plus a table read.
+    """
+    def __init__(self, dopants: List[dict]):
+        self.dopants = list(dopants)
+        lo = np.array([d["spectrum_nm"][0] for d in self.dopants], dtype=np.float64)
+        hi = np.array([d["spectrum_nm"][1] for d in self.dopants], dtype=np.float64)
+        self.bounds = sorted(set(lo.tolist()) | set(hi.tolist()))
+        # Piece 2k is the gap just below bounds[k], piece 2k+1 is bounds[k] itself
+        edges = np.array(self.bounds)
+        below = np.concatenate(([-np.inf], edges))
+        above = np.concatenate((edges, [np.inf]))
+        gap_cover = (lo <= below[:, None]) & (above[:, None] <= hi)
+        point_cover = (lo <= edges[:, None]) & (edges[:, None] <= hi)
+        self.cover = np.empty((2 * len(edges) + 1, len(self.dopants)), dtype=bool)
+        self.cover[0::2] = gap_cover
+        self.cover[1::2] = point_cover
+        self._members = [tuple(self.dopants[j] for j in np.flatnonzero(row)) for row in self.cover]
+
+    def _piece(self, wavelength_nm: float) -> int:
+        k = bisect.bisect_left(self.bounds, wavelength_nm)
+        exact = k < len(self.bounds) and self.bounds[k] == wavelength_nm
+        return 2 * k + exact
+
+    def dopants_at(self, wavelength_nm: float) -> List[dict]:
+        """Dopants whose emission range contains ``wavelength_nm``."""
+        if wavelength_nm != wavelength_nm:  # NaN
+            return []
+        return list(self._members[self._piece(wavelength_nm)])
+
+    def mask(self, wavelengths_nm) -> np.ndarray:
+        """(N_wavelengths x N_dopants) boolean coverage matrix for an array of wavelengths."""
+        wl = np.asarray(wavelengths_nm, dtype=np.float64)
+        edges = np.asarray(self.bounds, dtype=np.float64)
+        k = np.searchsorted(edges, wl, side="left")
+        exact = edges[np.minimum(k, len(edges) - 1)] == wl
+        exact &= k < len(edges)
+        out = self.cover[2 * k + exact]
+        out[np.isnan(wl)] = False
+        return out
+
+# --- Compact Emission Records ---
+class Emission:
+    """Single-layer emission for one cycle; slotted replacement for the emission dict."""
+    __slots__ = ("dopant", "element", "range_nm", "wavelength_nm", "energy",
+                 "units", "activated_voltage", "color")
+
+    def __init__(self, dopant, element, range_nm, wavelength_nm, energy, units, activated_voltage, color):
+        self.dopant = dopant
+        self.element = element
+        self.range_nm = range_nm
+        self.wavelength_nm = wavelength_nm
+        self.energy = energy
+        self.units = units
+        self.activated_voltage = activated_voltage
+        self.color = color
+
+    def __getitem__(self, key: str):
+        # Lets existing ``e["energy"]`` style callers keep working
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"Emission({self.dopant}, {self.wavelength_nm:.1f} nm, {self.energy:.3f} {self.units})"
+
+
+class EmissionBatch:
+    """
+    Struct-of-arrays emissions for a batch of cycles.
+    Every column is an (N_samples x N_layers) array; entries where
+    ``active`` is False hold NaN / -1 and are ignored by the stages.
+    Stage outputs (pv_energy, tpv_energy, elec_output, recycled) are
+    per-sample arrays filled in by QuantumPhotonDevice.run_batch.
+    """
+    __slots__ = ("layers", "units", "active", "wavelength_nm", "energy",
+                 "activated_voltage", "color_index",
+                 "pv_energy", "tpv_energy", "elec_output", "recycled")
+
+    def __init__(self, layers: List["DopedLayer"], voltages: np.ndarray, excitation: np.ndarray, units: str = "eV"):
+        self.layers = layers
+        self.units = units
+        self.active = excitation["active"]
+        self.wavelength_nm = excitation["wavelength_nm"]
+        self.energy = excitation["energy"]
+        self.color_index = excitation["color_index"]
+        self.activated_voltage = np.where(self.active, voltages, np.nan)
+        self.pv_energy = None
+        self.tpv_energy = None
+        self.elec_output = None
+        self.recycled = None
+
+    def __len__(self) -> int:
+        return self.active.shape[0]
+
+    def amplify(self, gain_factor: float) -> None:
+        """Optical gain stage, applied in place."""
+        np.multiply(self.energy, gain_factor, out=self.energy)
+
+    def split_pv_tpv(self, cutoff_nm: float = PV_TPV_CUTOFF_NM):
+        """Per-sample PV/TPV energy totals, summed layer by layer like run_cycle."""
+        n_samples, n_layers = self.active.shape
+        pv = np.zeros(n_samples)
+        tpv = np.zeros(n_samples)
+        to_pv = self.active & (self.wavelength_nm < cutoff_nm)
+        to_tpv = self.active & (self.wavelength_nm >= cutoff_nm)
+        for j in range(n_layers):
+            pv += np.where(to_pv[:, j], self.energy[:, j], 0.0)
+            tpv += np.where(to_tpv[:, j], self.energy[:, j], 0.0)
+        self.pv_energy = pv
+        self.tpv_energy = tpv
+        return pv, tpv
+
+    def recycle(self, fraction: float = RECYCLE_FRACTION) -> np.ndarray:
+        """Recycled photon count per sample (truncated, as in run_cycle)."""
+        self.recycled = (self.active.sum(axis=1) * fraction).astype(np.int64)
+        return self.recycled
+
+    def records(self, sample: int) -> List[Emission]:
+        """Emission records for one sample, in layer order."""
+        out = []
+        for j in np.flatnonzero(self.active[sample]):
+            dopant = self.layers[j].dopant
+            out.append(Emission(
+                dopant["name"], dopant["element"], dopant["spectrum_nm"],
+                float(self.wavelength_nm[sample, j]), float(self.energy[sample, j]),
+                self.units, float(self.activated_voltage[sample, j]),
+                COLOR_NAMES[self.color_index[sample, j]],
+            ))
+        return out
+
+    def as_dicts(self, sample: int) -> List[dict]:
+        return [e.as_dict() for e in self.records(sample)]
 
 # --- Layer Class ---
 class DopedLayer:
-    def __init__(self, dopant: dict, voltage_tolerance: float = DEFAULT_TOLERANCE):
+    def __init__(self, dopant: dict, voltage_tolerance: float = DEFAULT_TOLERANCE, voltage_effect: float = VOLTAGE_EFFECT):
         self.dopant = dopant
         self.base_voltage = dopant["voltage"]
         self.voltage_tolerance = voltage_tolerance
+        self.voltage_effect = voltage_effect
         self.reset()
 
     def reset(self):
@@ -51,43 +207,151 @@ class DopedLayer:
         self.reset()
         delta = abs(applied_voltage - self.base_voltage)
         if delta < self.voltage_tolerance:
-            shift_factor = 1 - VOLTAGE_EFFECT * (applied_voltage - self.base_voltage)
+            shift_factor = 1 - self.voltage_effect * (applied_voltage - self.base_voltage)
             self.shifted_wavelength = self.dopant["base_wavelength"] * shift_factor
             self.photon_energy = PLANCK * C / self.shifted_wavelength
             self.active_voltage = applied_voltage
             return True
         return False
 
-    def emission_data(self, units: str = "eV") -> Optional[dict]:
+    def emission(self, units: str = "eV") -> Optional[Emission]:
         if self.photon_energy is None:
             return None
         energy = self.photon_energy / E_CHARGE if units == "eV" else self.photon_energy
         wavelength_nm = self.shifted_wavelength * 1e9
-        return {
-            "dopant": self.dopant["name"],
-            "element": self.dopant["element"],
-            "range_nm": self.dopant["spectrum_nm"],
-            "wavelength_nm": wavelength_nm,
-            "energy": energy,
-            "units": units,
-            "activated_voltage": self.active_voltage,
-            "color": wavelength_to_color(wavelength_nm)
-        }
+        return Emission(
+            self.dopant["name"],
+            self.dopant["element"],
+            self.dopant["spectrum_nm"],
+            wavelength_nm,
+            energy,
+            units,
+            self.active_voltage,
+            wavelength_to_color(wavelength_nm),
+        )
+
+    def emission_data(self, units: str = "eV") -> Optional[dict]:
+        emission = self.emission(units)
+        return emission.as_dict() if emission is not None else None
+
+# --- Batch Excitation Record Layout ---
+# One element per (sample, layer); inactive layers carry NaN and color_index -1.
+EXCITATION_DTYPE = np.dtype([
+    ("active", np.bool_),
+    ("wavelength_nm", np.float64),
+    ("energy", np.float64),
+    ("color_index", np.int8),
+])
 
 # --- Quantum Chip ---
 class QuantumPhotonChip:
-    def __init__(self, dopants: List[dict], voltage_tolerance: float = DEFAULT_TOLERANCE):
-        self.layers = [DopedLayer(dopant, voltage_tolerance) for dopant in dopants]
+    def __init__(self, dopants: List[dict], voltage_tolerance: float = DEFAULT_TOLERANCE, voltage_effect: float = VOLTAGE_EFFECT):
+        self.layers = [DopedLayer(dopant, voltage_tolerance, voltage_effect) for dopant in dopants]
 
-    def excite_layers(self, applied_voltages: List[float], units: str = "eV") -> List[dict]:
+    def layer_parameters(self):
+        """Per-layer (base_voltage, base_wavelength, voltage_tolerance, voltage_effect) as float64 arrays."""
+        base_voltage = np.array([layer.base_voltage for layer in self.layers], dtype=np.float64)
+        base_wavelength = np.array([layer.dopant["base_wavelength"] for layer in self.layers], dtype=np.float64)
+        tolerance = np.array([layer.voltage_tolerance for layer in self.layers], dtype=np.float64)
+        effect = np.array([layer.voltage_effect for layer in self.layers], dtype=np.float64)
+        return base_voltage, base_wavelength, tolerance, effect
+
+    def excite_batch(self, applied_voltages, units: str = "eV") -> np.ndarray:
+        """
+        Excite every layer for a whole block of voltage vectors at once.
+        Takes an (N_samples x N_layers) array and returns an EXCITATION_DTYPE
+        structured array of the same shape, matching DopedLayer.excite and
+        emission_data value for value.
+        """
+        volts = np.asarray(applied_voltages, dtype=np.float64)
+        if volts.ndim == 1:
+            volts = volts[np.newaxis, :]
+        if volts.ndim != 2 or volts.shape[1] != len(self.layers):
+            raise ValueError(
+                f"expected voltages of shape (N, {len(self.layers)}), got {volts.shape}"
+            )
+        base_voltage, base_wavelength, tolerance, effect = self.layer_parameters()
+
+        mismatch = volts - base_voltage
+        active = np.abs(mismatch) < tolerance
+        shifted_wavelength = base_wavelength * (1 - effect * mismatch)
+        photon_energy = PLANCK * C / shifted_wavelength
+        energy = photon_energy / E_CHARGE if units == "eV" else photon_energy
+        wavelength_nm = shifted_wavelength * 1e9
+
+        out = np.empty(volts.shape, dtype=EXCITATION_DTYPE)
+        out["active"] = active
+        out["wavelength_nm"] = np.where(active, wavelength_nm, np.nan)
+        out["energy"] = np.where(active, energy, np.nan)
+        out["color_index"] = np.where(active, wavelength_to_color_index(wavelength_nm), -1)
+        return out
+
+    def excite_emissions(self, applied_voltages: List[float], units: str = "eV") -> List[Emission]:
         emissions = []
         for layer, voltage in zip(self.layers, applied_voltages):
             if layer.excite(voltage):
-                data = layer.emission_data(units)
-                if data:
-                    emissions.append(data)
+                emissions.append(layer.emission(units))
         return emissions
 
+    def excite_layers(self, applied_voltages: List[float], units: str = "eV") -> List[dict]:
+        return [e.as_dict() for e in self.excite_emissions(applied_voltages, units)]
+
+# --- Device Cycle Results ---
+class CycleResult(NamedTuple):
+    """Outcome of one QuantumPhotonDevice cycle."""
+    input_voltages: List[float]
+    emissions: List[Emission]     # Post-gain: the gain stage scales each record's energy in place
+    pv_energy: float
+    tpv_energy: float
+    elec_output: float
+    recycled: int
+    energy_collected: float       # Cumulative device output after this cycle
+    gain_factor: float            # Gain applied to the emissions this cycle
+
+    @property
+    def amplified(self) -> List[float]:
+        """Post-gain energies, parallel to emissions."""
+        return [e.energy for e in self.emissions]
+
+
+def console_report(device: "QuantumPhotonDevice", result: CycleResult):
+    """Human-readable cycle report; attach with QuantumPhotonDevice.attach_sink."""
+    units = device.units
+    print("\n[Quantum Photon Device Cycle Initiated]")
+    print(f"Applied voltages (per layer): {result.input_voltages}")
+    if not result.emissions:
+        print("No layers activated: voltage mismatch.")
+        return
+
+    print("\n[Photon Emissions (Layer-resolved)]:")
+    gain = result.gain_factor
+    for e in result.emissions:
+        emitted = e.energy / gain if gain else 0.0
+        print(
+            f"Layer {e.dopant} ({e.element}): "
+            f"{e.wavelength_nm:.1f} nm, {emitted:.3f} {e.units} (V={e.activated_voltage}) | Color: {e.color}"
+        )
+
+    print("\n[Amplified Photon Output]:")
+    for e in result.emissions:
+        print(
+            f"Layer {e.dopant}: {e.energy:.3f} {e.units} (amplified) | Color: {e.color}"
+        )
+
+    print(f"\n[PV ({device.photovoltaic_type}) efficiency]: {device.pv_eff*100:.1f}%")
+    print(f"[TPV ({device.tpv_type}) efficiency]: {device.tpv_eff*100:.1f}%")
+    print(f"[Total Electrical Output this cycle]: {result.elec_output:.3f} {units}")
+    print(f"[Cumulative Device Output]: {result.energy_collected:.3f} {units}")
+
+    print(f"\n[Photon Recycling]: {result.recycled} photons recycled (simulated)")
+
+    print("\n[OLED/Gas Frequency Display]:")
+    for e in result.emissions:
+        print(
+            f"{e.dopant} ({e.element}): {e.wavelength_nm:.1f} nm | "
+            f"{e.color} | {e.energy:.3f} {e.units}"
+        )
+
 # --- Quantum Device Pipeline ---
 class QuantumPhotonDevice:
     def __init__(
@@ -99,8 +363,16 @@ class QuantumPhotonDevice:
         pv_eff: float = 0.27,
         tpv_eff: float = 0.16,
         gain_factor: float = 2.0,
-        units: str = "eV"
+        units: str = "eV",
+        incremental: bool = False,
+        voltage_epsilon: float = 0.0,
     ):
+        """
+        With ``incremental``, execute_cycle re-excites only the layers whose
+        voltage moved by more than ``voltage_epsilon`` since they were last
+        excited, reusing cached emissions for the rest, and updates the
+        PV/TPV totals by delta (see _execute_incremental).
+        """
         self.chip = chip
         self.gain_medium = gain_medium
         self.photovoltaic_type = photovoltaic_type
@@ -110,57 +382,216 @@ class QuantumPhotonDevice:
         self.gain_factor = gain_factor
         self.energy_collected = 0.0   # Cumulative electrical output (in units)
         self.units = units
+        self.sinks: List[Callable[["QuantumPhotonDevice", CycleResult], None]] = []
+        self.metrics = None           # instrumentation.Metrics when recording
+        self.incremental = incremental
+        self.voltage_epsilon = voltage_epsilon
+        self.reset_incremental()
 
-    def run_cycle(self, input_voltages: List[float]):
-        print("\n[Quantum Photon Device Cycle Initiated]")
-        print(f"Applied voltages (per layer): {input_voltages}")
+    def attach_sink(self, sink: Callable[["QuantumPhotonDevice", CycleResult], None]):
+        """Register a callable invoked as ``sink(device, result)`` after every cycle."""
+        self.sinks.append(sink)
 
-        # 1. Excite each dopant layer independently
-        emissions = self.chip.excite_layers(input_voltages, self.units)
-        if not emissions:
-            print("No layers activated: voltage mismatch.")
-            return
+    def detach_sink(self, sink):
+        self.sinks.remove(sink)
 
-        print("\n[Photon Emissions (Layer-resolved)]:")
-        for e in emissions:
-            print(
-                f"Layer {e['dopant']} ({e['element']}): "
-                f"{e['wavelength_nm']:.1f} nm, {e['energy']:.3f} {e['units']} (V={e['activated_voltage']}) | Color: {e['color']}"
-            )
+    def execute_cycle(self, input_voltages: List[float]) -> CycleResult:
+        """Run one cycle without printing and return its results."""
+        if self.incremental:
+            return self._execute_incremental(input_voltages)
+        metrics = self.metrics
+        if metrics is not None:
+            t0 = perf_counter()
+
+        # 1. Excite each dopant layer independently
+        emissions = self.chip.excite_emissions(input_voltages, self.units)
+        if metrics is not None:
+            t1 = perf_counter()
 
-        # 2. Optical Gain (simulated amplification)
-        amplified = []
+        # 2. Optical Gain (simulated amplification, in place)
+        gain = self.gain_factor
         for e in emissions:
-            amp = e.copy()
-            amp["energy"] *= self.gain_factor
-            amplified.append(amp)
-        print("\n[Amplified Photon Output]:")
-        for a in amplified:
-            print(
-                f"Layer {a['dopant']}: {a['energy']:.3f} {a['units']} (amplified) | Color: {a['color']}"
-            )
+            e.energy *= gain
+        if metrics is not None:
+            t2 = perf_counter()
 
         # 3. Energy Conversion (PV & TPV)
-        pv_energy = sum(a["energy"] for a in amplified if a["wavelength_nm"] < 700)
-        tpv_energy = sum(a["energy"] for a in amplified if a["wavelength_nm"] >= 700)
+        pv_energy = 0.0
+        tpv_energy = 0.0
+        for e in emissions:
+            if e.wavelength_nm < PV_TPV_CUTOFF_NM:
+                pv_energy += e.energy
+            else:
+                tpv_energy += e.energy
         elec_output = pv_energy * self.pv_eff + tpv_energy * self.tpv_eff
-
         self.energy_collected += elec_output
-        print(f"\n[PV ({self.photovoltaic_type}) efficiency]: {self.pv_eff*100:.1f}%")
-        print(f"[TPV ({self.tpv_type}) efficiency]: {self.tpv_eff*100:.1f}%")
-        print(f"[Total Electrical Output this cycle]: {elec_output:.3f} {self.units}")
-        print(f"[Cumulative Device Output]: {self.energy_collected:.3f} {self.units}")
+        if metrics is not None:
+            t3 = perf_counter()
 
         # 4. Photon Recycling (40% simulated feedback)
-        recycled = int(len(amplified) * 0.4)
-        print(f"\n[Photon Recycling]: {recycled} photons recycled (simulated)")
-
-        # 5. OLED/Gas Display Output
-        print("\n[OLED/Gas Frequency Display]:")
-        for a in amplified:
-            print(
-                f"{a['dopant']} ({a['element']}): {a['wavelength_nm']:.1f} nm | "
-                f"{a['color']} | {a['energy']:.3f} {a['units']}"
-            )
+        recycled = int(len(emissions) * RECYCLE_FRACTION)
+
+        result = CycleResult(
+            input_voltages, emissions, pv_energy, tpv_energy,
+            elec_output, recycled, self.energy_collected, gain,
+        )
+        if metrics is None:
+            for sink in self.sinks:
+                sink(self, result)
+            return result
+        return self._publish_timed(result, metrics, (t1 - t0, t2 - t1, t3 - t2, perf_counter() - t3))
+
+    def _publish_timed(self, result: CycleResult, metrics, stage_seconds) -> CycleResult:
+        # 5. Display (attached sinks), timed along with the other stages
+        metrics.record_cycle(self, result, stage_seconds)
+        if self.sinks:
+            start = perf_counter()
+            for sink in self.sinks:
+                sink(self, result)
+            metrics.record_display(perf_counter() - start)
+        return result
+
+    # --- Incremental mode ---
+    def reset_incremental(self):
+        """Drop cached per-layer state; the next incremental cycle re-excites every layer."""
+        self._inc_voltages: Optional[List[float]] = None   # Voltage each cached layer was excited at
+        self._inc_emissions: List[Optional[Emission]] = []    # Post-gain, one per layer
+        self._inc_emission_list: List[Emission] = []
+        self._inc_gain = None
+        self._inc_units = None
+        self._inc_pv = 0.0
+        self._inc_tpv = 0.0
+        self._inc_since_resync = 0
+
+    def _execute_incremental(self, input_voltages: List[float]) -> CycleResult:
+        """
+        Incremental execute_cycle. Excitation, gain and PV/TPV conversion cost
+        O(changed layers); the per-cycle emission lists are rebuilt only when
+        something changed. Every layer is re-evaluated (and the totals re-summed
+        in layer order, exactly as run_cycle does) on the first cycle, when the
+        layer count, units or gain change, when more than half the layers
+        changed, and every INCREMENTAL_RESYNC_CYCLES cycles to bound the
+        rounding drift of the delta updates. With voltage_epsilon > 0 a layer
+        keeps the emission of the voltage it was last excited at.
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            t0 = perf_counter()
+        layers = self.chip.layers
+        units = self.units
+        gain = self.gain_factor
+        n = min(len(layers), len(input_voltages))
+        cached = self._inc_voltages
+
+        full = (
+            cached is None or len(cached) != n or units != self._inc_units or gain != self._inc_gain
+            or self._inc_since_resync >= INCREMENTAL_RESYNC_CYCLES
+        )
+        if not full:
+            epsilon = self.voltage_epsilon
+            changed = [i for i in range(n) if abs(input_voltages[i] - cached[i]) > epsilon]
+            full = 2 * len(changed) > n
+        if full:
+            changed = range(n)
+            cached = self._inc_voltages = [None] * n
+            self._inc_emissions = [None] * n
+            self._inc_units = units
+            self._inc_gain = gain
+            previous = ()
+        else:
+            previous = [self._inc_emissions[i] for i in changed]
+        emissions_by_layer = self._inc_emissions
+
+        # 1. Excite the changed layers
+        for i in changed:
+            voltage = input_voltages[i]
+            cached[i] = voltage
+            layer = layers[i]
+            emissions_by_layer[i] = layer.emission(units) if layer.excite(voltage) else None
+        if metrics is not None:
+            t1 = perf_counter()
+
+        # 2. Optical Gain, in place on the fresh records
+        for i in changed:
+            e = emissions_by_layer[i]
+            if e is not None:
+                e.energy *= gain
+        if metrics is not None:
+            t2 = perf_counter()
+
+        # 3. Energy Conversion: retract the changed layers' old shares, add the new ones
+        pv_energy = 0.0 if full else self._inc_pv
+        tpv_energy = 0.0 if full else self._inc_tpv
+        for e in previous:
+            if e is not None:
+                if e.wavelength_nm < PV_TPV_CUTOFF_NM:
+                    pv_energy -= e.energy
+                else:
+                    tpv_energy -= e.energy
+        for i in changed:
+            e = emissions_by_layer[i]
+            if e is not None:
+                if e.wavelength_nm < PV_TPV_CUTOFF_NM:
+                    pv_energy += e.energy
+                else:
+                    tpv_energy += e.energy
+        self._inc_pv = pv_energy
+        self._inc_tpv = tpv_energy
+        self._inc_since_resync = 0 if full else self._inc_since_resync + 1
+        elec_output = pv_energy * self.pv_eff + tpv_energy * self.tpv_eff
+        self.energy_collected += elec_output
+        if metrics is not None:
+            t3 = perf_counter()
+
+        # 4. Photon Recycling
+        if full or changed:
+            self._inc_emission_list = [e for e in emissions_by_layer if e is not None]
+        emissions = self._inc_emission_list
+        recycled = int(len(emissions) * RECYCLE_FRACTION)
+
+        result = CycleResult(
+            input_voltages, emissions, pv_energy, tpv_energy,
+            elec_output, recycled, self.energy_collected, gain,
+        )
+        if metrics is None:
+            for sink in self.sinks:
+                sink(self, result)
+            return result
+        return self._publish_timed(result, metrics, (t1 - t0, t2 - t1, t3 - t2, perf_counter() - t3))
+
+    def run_cycles(self, voltage_stream: Iterable[List[float]]) -> Iterator[CycleResult]:
+        """Lazily run one silent cycle per voltage vector drawn from ``voltage_stream``."""
+        for input_voltages in voltage_stream:
+            yield self.execute_cycle(input_voltages)
 
+    def run_cycle(self, input_voltages: List[float]) -> CycleResult:
+        """Run one cycle and print the full console report."""
+        result = self.execute_cycle(input_voltages)
+        if console_report not in self.sinks:
+            if self.metrics is None:
+                console_report(self, result)
+            else:
+                start = perf_counter()
+                console_report(self, result)
+                self.metrics.record_display(perf_counter() - start)
+        return result
 
+    def run_batch(self, input_voltages) -> EmissionBatch:
+        """
+        Silent batch counterpart of run_cycle over an (N_samples x N_layers)
+        voltage array. Gain, PV/TPV split and recycling run in place on the
+        returned EmissionBatch; energy_collected accumulates sample by sample.
+        """
+        volts = np.asarray(input_voltages, dtype=np.float64)
+        if volts.ndim == 1:
+            volts = volts[np.newaxis, :]
+        batch = EmissionBatch(self.chip.layers, volts, self.chip.excite_batch(volts, self.units), self.units)
+        batch.amplify(self.gain_factor)
+        pv, tpv = batch.split_pv_tpv()
+        batch.elec_output = pv * self.pv_eff + tpv * self.tpv_eff
+        batch.recycle()
+        # cumsum is strictly sequential, so the total matches repeated run_cycle calls
+        if len(batch):
+            running = np.cumsum(np.concatenate(([self.energy_collected], batch.elec_output)))
+            self.energy_collected = float(running[-1])
+        return batch
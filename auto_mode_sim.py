@@ -0,0 +1,266 @@
+"""
+Discrete-event, time-domain simulation of PhotonicChip fleets in Auto mode.
+
+Chips are put in Auto mode (MODE_SELECT = 1) and driven by a stream of gas
+arrivals. Each arrival starts an emission when the chip is idle, or waits
+in that chip's backlog while an emission is in flight. Emissions complete
+after ``emission_latency`` through RegisterFile.complete_emission, which
+raises the completion interrupt; the host services each interrupt
+``irq_latency`` later by reading EMISSION_STATUS. A periodic drift event
+moves every chip's temperature (mean-reverting random walk), which feeds
+thermal_loss_factor for emissions started afterwards.
+
+Pending events live in a heap (O(log n) push/pop); the pre-sorted arrival
+stream is merged against the heap head instead of being pushed into it, so
+the heap holds only in-flight work. Results are returned as NumPy time
+series rather than printed.
+
+Usage:
+    sim = AutoModeSimulator(n_chips=1000, seed=1)
+    sim.schedule_arrivals(*poisson_arrivals(1000, rate_hz=200, duration_s=5.0, seed=1))
+    result = sim.run(until=5.0)
+    result.emissions["photons"].sum()
+"""
+
+import heapq
+import math
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from energy_photon_chip_design import ENERGY_BUDGET, TEMPERATURE_DEFAULT, PhotonicChip
+
+# Event kinds (heap entries are (time, seq, kind, chip, payload))
+EVENT_EMISSION_DONE = 0
+EVENT_INTERRUPT = 1
+EVENT_DRIFT = 2
+
+INTERRUPT_CAUSE_CODES = {"emission": 1, "error": 2}
+
+
+class AutoModeResult(NamedTuple):
+    emissions: Dict[str, np.ndarray]    # time, chip, gas, photons, energy_J (at completion)
+    interrupts: Dict[str, np.ndarray]   # time, chip, cause, status (when serviced)
+    temperature: Dict[str, np.ndarray]  # time, mean, min, max (per drift tick)
+    events: int                         # Events processed, arrivals included
+    max_backlog: int                    # Longest per-chip arrival backlog seen
+    ignored_arrivals: int               # Arrivals at chips not in Auto mode
+
+
+def poisson_arrivals(
+    n_chips: int,
+    rate_hz: float,
+    duration_s: float,
+    gas_values: Optional[Sequence[float]] = None,
+    seed: Optional[int] = None,
+):
+    """
+    Poisson gas arrivals at ``rate_hz`` per chip over ``duration_s``.
+    Gas amounts are drawn uniformly from ``gas_values`` (default: the
+    ENERGY_BUDGET operations). Returns sorted (times, chips, gas) arrays.
+    """
+    rng = np.random.default_rng(seed)
+    gas_values = np.asarray(gas_values if gas_values is not None else [e["gas"] for e in ENERGY_BUDGET], dtype=np.float64)
+    n = rng.poisson(rate_hz * n_chips * duration_s)
+    times = np.sort(rng.uniform(0.0, duration_s, n))
+    chips = rng.integers(0, n_chips, n)
+    gas = gas_values[rng.integers(0, len(gas_values), n)]
+    return times, chips, gas
+
+
+class AutoModeSimulator:
+    def __init__(
+        self,
+        chips: Optional[List[PhotonicChip]] = None,
+        n_chips: int = 1,
+        emission_latency: float = 1e-6,
+        irq_latency: float = 1e-7,
+        drift_interval: float = 1e-2,
+        drift_sigma: float = 5.0,
+        drift_theta: float = 1.0,
+        ambient_K: float = TEMPERATURE_DEFAULT,
+        interrupts: bool = True,
+        seed: Optional[int] = None,
+    ):
+        """
+        ``drift_sigma`` is the temperature noise in K/sqrt(s) and
+        ``drift_theta`` the pull back towards ``ambient_K`` in 1/s; set
+        ``drift_interval`` to 0 to hold temperatures fixed.
+        """
+        if chips is None:
+            chips = [PhotonicChip(register_trace_capacity=0) for _ in range(n_chips)]
+        self.chips = chips
+        self.emission_latency = emission_latency
+        self.irq_latency = irq_latency
+        self.drift_interval = drift_interval
+        self.drift_sigma = drift_sigma
+        self.drift_theta = drift_theta
+        self.ambient_K = ambient_K
+        self.rng = np.random.default_rng(seed)
+
+        self.now = 0.0
+        self._heap = []
+        self._seq = 0
+        self._backlog: Dict[int, deque] = {}
+        self._arrival_times = np.empty(0)
+        self._arrival_chips = np.empty(0, dtype=np.int64)
+        self._arrival_gas = np.empty(0)
+        self._next_arrival = 0
+
+        self.temperatures = np.array([chip.temperature for chip in chips], dtype=np.float64)
+        for index, chip in enumerate(chips):
+            chip.registers.write(0x00, 1)
+            if interrupts:
+                chip.registers.write(0x06, 1)
+            chip.registers.interrupt_handler = self._make_interrupt_handler(index)
+
+        self._emissions = {"time": [], "chip": [], "gas": [], "photons": [], "energy_J": []}
+        self._interrupts = {"time": [], "chip": [], "cause": [], "status": []}
+        self._temperature = {"time": [], "mean": [], "min": [], "max": []}
+        self.events = 0
+        self.max_backlog = 0
+        self.ignored_arrivals = 0
+
+        if drift_interval > 0:
+            self.schedule(drift_interval, EVENT_DRIFT)
+
+    # --- Scheduling ---
+    def schedule(self, time: float, kind: int, chip: int = -1, payload=None):
+        heapq.heappush(self._heap, (time, self._seq, kind, chip, payload))
+        self._seq += 1
+
+    def schedule_arrivals(self, times, chips, gas):
+        """Add gas arrivals; merged with any not yet processed, in time order."""
+        k = self._next_arrival
+        times = np.concatenate((self._arrival_times[k:], np.asarray(times, dtype=np.float64)))
+        chips = np.concatenate((self._arrival_chips[k:], np.asarray(chips, dtype=np.int64)))
+        gas = np.concatenate((self._arrival_gas[k:], np.asarray(gas, dtype=np.float64)))
+        order = np.argsort(times, kind="stable")
+        self._arrival_times = times[order]
+        self._arrival_chips = chips[order]
+        self._arrival_gas = gas[order]
+        self._next_arrival = 0
+
+    def _make_interrupt_handler(self, index: int):
+        def handler(register_file, cause):
+            self.schedule(self.now + self.irq_latency, EVENT_INTERRUPT, index, INTERRUPT_CAUSE_CODES.get(cause, 0))
+        return handler
+
+    # --- Event handlers ---
+    def _start_emission(self, index: int, gas: float):
+        chip = self.chips[index]
+        chip.gas_input = int(gas)
+        chip.registers.busy = True
+        photons = chip.register_emission(gas)
+        self.schedule(self.now + self.emission_latency, EVENT_EMISSION_DONE, index, (gas, photons))
+
+    def _on_arrival(self, index: int, gas: float):
+        chip = self.chips[index]
+        if chip.mode != 1:
+            self.ignored_arrivals += 1
+            return
+        if chip.registers.busy:
+            backlog = self._backlog.setdefault(index, deque())
+            backlog.append(gas)
+            if len(backlog) > self.max_backlog:
+                self.max_backlog = len(backlog)
+            return
+        self._start_emission(index, gas)
+
+    def _on_emission_done(self, index: int, payload):
+        gas, photons = payload
+        chip = self.chips[index]
+        log = self._emissions
+        log["time"].append(self.now)
+        log["chip"].append(index)
+        log["gas"].append(gas)
+        log["photons"].append(photons)
+        log["energy_J"].append(photons * chip.photon_energy())
+        chip.registers.complete_emission(photons)
+        backlog = self._backlog.get(index)
+        if backlog:
+            self._start_emission(index, backlog.popleft())
+
+    def _on_interrupt(self, index: int, cause: int):
+        # Host interrupt service routine: read (and so clear) the status register
+        status = self.chips[index].registers.read(0x04)
+        log = self._interrupts
+        log["time"].append(self.now)
+        log["chip"].append(index)
+        log["cause"].append(cause)
+        log["status"].append(status)
+
+    def _on_drift(self):
+        dt = self.drift_interval
+        temps = self.temperatures
+        temps += self.drift_theta * (self.ambient_K - temps) * dt
+        temps += self.drift_sigma * math.sqrt(dt) * self.rng.standard_normal(len(temps))
+        for chip, temperature in zip(self.chips, temps.tolist()):
+            chip.temperature = temperature
+        log = self._temperature
+        log["time"].append(self.now)
+        log["mean"].append(float(temps.mean()))
+        log["min"].append(float(temps.min()))
+        log["max"].append(float(temps.max()))
+        self.schedule(self.now + dt, EVENT_DRIFT)
+
+    # --- Main loop ---
+    def run(self, until: float = math.inf, max_events: Optional[int] = None) -> AutoModeResult:
+        """Process events up to time ``until`` (inclusive) and return the time series so far."""
+        heap = self._heap
+        arrival_times = self._arrival_times
+        n_arrivals = len(arrival_times)
+        limit = max_events if max_events is not None else math.inf
+        processed = 0
+        while processed < limit:
+            k = self._next_arrival
+            t_arrival = arrival_times[k] if k < n_arrivals else math.inf
+            t_event = heap[0][0] if heap else math.inf
+            if t_arrival <= t_event:
+                if t_arrival > until or t_arrival == math.inf:
+                    break
+                self.now = float(t_arrival)
+                self._next_arrival = k + 1
+                self._on_arrival(int(self._arrival_chips[k]), float(self._arrival_gas[k]))
+            else:
+                if t_event > until:
+                    break
+                # Drift alone keeps the heap non-empty; stop once nothing else is left
+                if heap[0][2] == EVENT_DRIFT and len(heap) == 1 and k >= n_arrivals and until == math.inf:
+                    break
+                time, _, kind, index, payload = heapq.heappop(heap)
+                self.now = time
+                if kind == EVENT_EMISSION_DONE:
+                    self._on_emission_done(index, payload)
+                elif kind == EVENT_INTERRUPT:
+                    self._on_interrupt(index, payload)
+                else:
+                    self._on_drift()
+            processed += 1
+        self.events += processed
+        return self.result()
+
+    def result(self) -> AutoModeResult:
+        emissions = self._emissions
+        interrupts = self._interrupts
+        temperature = self._temperature
+        return AutoModeResult(
+            emissions={
+                "time": np.array(emissions["time"], dtype=np.float64),
+                "chip": np.array(emissions["chip"], dtype=np.int64),
+                "gas": np.array(emissions["gas"], dtype=np.float64),
+                "photons": np.array(emissions["photons"], dtype=np.float64),
+                "energy_J": np.array(emissions["energy_J"], dtype=np.float64),
+            },
+            interrupts={
+                "time": np.array(interrupts["time"], dtype=np.float64),
+                "chip": np.array(interrupts["chip"], dtype=np.int64),
+                "cause": np.array(interrupts["cause"], dtype=np.uint8),
+                "status": np.array(interrupts["status"], dtype=np.uint8),
+            },
+            temperature={name: np.array(values, dtype=np.float64) for name, values in temperature.items()},
+            events=self.events,
+            max_backlog=self.max_backlog,
+            ignored_arrivals=self.ignored_arrivals,
+        )
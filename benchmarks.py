@@ -0,0 +1,407 @@
+"""
+Benchmark suite for the simulation hot paths, with regression tracking.
+
+Every benchmark runs at several input sizes. For each (benchmark, size)
+case the harness spends half of ``max_time`` on throughput, timing
+batches of calls (the batch size is calibrated so one sample takes at
+least ``min_sample``), and half on latency, timing single calls. It
+reports ops/sec (and items/sec where an op covers ``size`` items) from
+the batches, p50/p99 latency from the single calls, and the peak traced
+allocation of a single op (tracemalloc, measured in a separate pass so it
+does not skew timings).
+
+Usage:
+    python benchmarks.py run -o bench.json                 # full suite
+    python benchmarks.py run -o bench.json --filter register --max-time 0.5
+    python benchmarks.py compare baseline.json bench.json  # exit 1 on regression
+"""
+
+import argparse
+import atexit
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from energy_photon_chip_design import PhotonicChip
+from rose_quartz import DOPANT_LAYERS, DopedLayer, QuantumPhotonChip, QuantumPhotonDevice
+
+RESULTS_VERSION = 2           # 2: p50/p99 from single-call timings, not batch means
+DEFAULT_MAX_TIME = 1.0        # seconds of timing per case
+DEFAULT_MIN_SAMPLE = 2e-3     # seconds per timing sample (calls are batched up to this)
+DEFAULT_MAX_SAMPLES = 200
+DEFAULT_MAX_LATENCY_SAMPLES = 20000
+MIN_LATENCY_SAMPLES = 20
+DEFAULT_THRESHOLD = 0.10      # allowed relative drop in ops/sec
+DEFAULT_MEMORY_THRESHOLD = 0.20
+MEMORY_SLACK_BYTES = 4096     # ignore peak-memory growth below this
+
+_devnull = None
+
+
+def _devnull_sink():
+    """Shared os.devnull handle for the run_cycle console report, opened on first use."""
+    global _devnull
+    if _devnull is None:
+        _devnull = open(os.devnull, "w")
+        atexit.register(_devnull.close)
+    return _devnull
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[int], Callable[[], object]]  # size -> zero-argument op
+    sizes: Sequence[int]
+    unit: str                                      # what ``size`` counts
+
+
+def _dopants(n_layers: int) -> List[dict]:
+    return [dict(DOPANT_LAYERS[i % len(DOPANT_LAYERS)]) for i in range(n_layers)]
+
+
+def _voltages(dopants: List[dict]) -> List[float]:
+    # Every other layer misses its window, so both excite branches run
+    return [d["voltage"] + (0.0 if i % 2 == 0 else 1.0) for i, d in enumerate(dopants)]
+
+
+# --- Benchmark setups ---
+def _setup_layer_excite(size):
+    layer = DopedLayer(DOPANT_LAYERS[0])
+    base = layer.base_voltage
+    voltages = [base + (0.05 if i % 2 == 0 else 1.0) for i in range(size)]
+    excite = layer.excite
+
+    def op():
+        for v in voltages:
+            excite(v)
+    return op
+
+
+def _setup_excite_layers(size):
+    dopants = _dopants(size)
+    chip = QuantumPhotonChip(dopants)
+    voltages = _voltages(dopants)
+    return lambda: chip.excite_layers(voltages)
+
+
+def _setup_run_cycle(size):
+    dopants = _dopants(size)
+    device = QuantumPhotonDevice(QuantumPhotonChip(dopants))
+    voltages = _voltages(dopants)
+    devnull = _devnull_sink()
+
+    def op():
+        # The console report is part of run_cycle; discard it rather than skip it
+        with contextlib.redirect_stdout(devnull):
+            device.run_cycle(voltages)
+    return op
+
+
+def _setup_incremental_cycle(size):
+    dopants = _dopants(size)
+    device = QuantumPhotonDevice(QuantumPhotonChip(dopants), incremental=True)
+    voltages = _voltages(dopants)
+    nudged = list(voltages)
+    nudged[0] += 0.01
+    device.execute_cycle(voltages)
+    state = [voltages, nudged]
+
+    def op():
+        # One layer changes per cycle, the slowly varying case incremental mode targets
+        state.reverse()
+        device.execute_cycle(state[0])
+    return op
+
+
+def _setup_photons_single(size):
+    chip = PhotonicChip()
+    gas = [float(21000 + i) for i in range(size)]
+    photons_emitted = chip.photons_emitted
+
+    def op():
+        for g in gas:
+            photons_emitted(g)
+    return op
+
+
+def _setup_photons_multi(size):
+    chip = PhotonicChip()
+    chip.wavelengths = np.linspace(400e-9, 1000e-9, size).tolist()
+    return lambda: chip.photons_emitted(21000, use_multi=True)
+
+
+def _setup_registers(size):
+    chip = PhotonicChip()
+    # Alternate PHOTON_SCALING writes and reads, the cheapest side-effect-free pair
+    ops = [(0x03, i & 0xFF) if i % 2 == 0 else (0x03, None) for i in range(size)]
+    return lambda: chip.registers.transact(ops)
+
+
+def _setup_mode_profile(size):
+    import waveguide_simulation as ws
+    wg = ws.Waveguide(
+        core=ws.Material("Silicon", n=3.48, alpha=0.5), cladding=ws.Material("SiO2", n=1.44, alpha=0.1),
+        width=0.5e-6, height=0.22e-6, length=2e-3,
+    )
+
+    def op():
+        # Measure the computation, not the lru_cache hit
+        ws._mode_profile.cache_clear()
+        return wg.mode_profile(size)
+    return op
+
+
+BENCHMARKS = [
+    Benchmark("DopedLayer.excite", _setup_layer_excite, (1, 100, 10_000), "excitations"),
+    Benchmark("QuantumPhotonChip.excite_layers", _setup_excite_layers, (3, 30, 300), "layers"),
+    Benchmark("QuantumPhotonDevice.run_cycle", _setup_run_cycle, (3, 30, 300), "layers"),
+    Benchmark("QuantumPhotonDevice.execute_cycle[incremental]", _setup_incremental_cycle, (3, 30, 300), "layers"),
+    Benchmark("PhotonicChip.photons_emitted", _setup_photons_single, (1, 100, 10_000), "calls"),
+    Benchmark("PhotonicChip.photons_emitted[multi]", _setup_photons_multi, (2, 32, 1024), "bands"),
+    Benchmark("RegisterFile.transact", _setup_registers, (1, 64, 4096), "register ops"),
+    Benchmark("Waveguide.mode_profile", _setup_mode_profile, (64, 256, 1024), "grid points per axis"),
+]
+
+
+# --- Measurement ---
+def _calibrate(op, min_sample):
+    """Calls per sample so that one sample takes at least ``min_sample`` seconds."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_sample or number >= 1 << 20:
+            return number
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_sample / elapsed) + 1))
+
+
+def _peak_memory(op) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        op()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _timer_overhead() -> float:
+    """Smallest cost of a back-to-back perf_counter pair, subtracted from single-call timings."""
+    perf_counter = time.perf_counter
+    return min(-(perf_counter() - perf_counter()) for _ in range(1000))
+
+
+def measure(
+    op,
+    max_time=DEFAULT_MAX_TIME,
+    min_sample=DEFAULT_MIN_SAMPLE,
+    max_samples=DEFAULT_MAX_SAMPLES,
+    max_latency_samples=DEFAULT_MAX_LATENCY_SAMPLES,
+) -> dict:
+    """
+    Time ``op`` and return ops/sec (from batched samples), p50/p99 latency
+    (seconds per op, from single-call timings) and peak bytes.
+    """
+    perf_counter = time.perf_counter
+    op()  # Warm caches and lazy imports
+    number = _calibrate(op, min_sample)
+    overhead = _timer_overhead()
+    samples = 0
+    total_time = 0.0
+    latencies = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        deadline = perf_counter() + max_time / 2
+        while samples < max_samples and (samples < 5 or perf_counter() < deadline):
+            start = perf_counter()
+            for _ in range(number):
+                op()
+            total_time += perf_counter() - start
+            samples += 1
+
+        deadline = perf_counter() + max_time / 2
+        while len(latencies) < max_latency_samples and (
+            len(latencies) < MIN_LATENCY_SAMPLES or perf_counter() < deadline
+        ):
+            start = perf_counter()
+            op()
+            latencies.append(perf_counter() - start - overhead)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    p50, p99 = np.percentile(np.maximum(latencies, 0.0), [50, 99])
+    return {
+        "ops_per_sec": samples * number / total_time,
+        "p50_s": float(p50),
+        "p99_s": float(p99),
+        "peak_bytes": _peak_memory(op),
+        "samples": samples,
+        "number": number,
+        "latency_samples": len(latencies),
+    }
+
+
+def run_suite(
+    benchmarks: Sequence[Benchmark] = BENCHMARKS,
+    name_filter: Optional[str] = None,
+    max_time: float = DEFAULT_MAX_TIME,
+    min_sample: float = DEFAULT_MIN_SAMPLE,
+    verbose: bool = True,
+) -> dict:
+    """Run every (benchmark, size) case and return the JSON-ready results document."""
+    results = []
+    for bench in benchmarks:
+        if name_filter and name_filter.lower() not in bench.name.lower():
+            continue
+        for size in bench.sizes:
+            stats = measure(bench.setup(size), max_time, min_sample)
+            row = {"benchmark": bench.name, "size": size, "unit": bench.unit, **stats}
+            row["items_per_sec"] = stats["ops_per_sec"] * size
+            results.append(row)
+            if verbose:
+                _print_row(row)
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def _print_row(row):
+    print(
+        f"{row['benchmark']:<48} {row['size']:>6}  {row['ops_per_sec']:>12,.1f} ops/s  "
+        f"p50 {row['p50_s'] * 1e6:>10.2f} us  p99 {row['p99_s'] * 1e6:>10.2f} us  "
+        f"peak {row['peak_bytes'] / 1024:>9.1f} KiB"
+    )
+
+
+def save_results(document: dict, path: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported results version {document.get('version')!r}")
+    return document
+
+
+# --- Regression tracking ---
+def compare(
+    baseline: dict,
+    current: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    memory_threshold: float = DEFAULT_MEMORY_THRESHOLD,
+) -> List[str]:
+    """
+    Compare two results documents case by case and return regression
+    messages: ops/sec down by more than ``threshold``, peak memory up by
+    more than ``memory_threshold`` (and MEMORY_SLACK_BYTES), or a baseline
+    case missing from ``current``. Ratios against a zero baseline value are
+    incomparable and shown as n/a. Prints a table.
+    """
+    base_rows: Dict[tuple, dict] = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"{'benchmark':<48} {'size':>6}  {'ops/s':>9}  {'p50':>8}  {'p99':>8}  {'peak mem':>9}")
+    for row in current["results"]:
+        key = (row["benchmark"], row["size"])
+        base = base_rows.pop(key, None)
+        if base is None:
+            print(f"{key[0]:<48} {key[1]:>6}  (new)")
+            continue
+        speed = _change(row["ops_per_sec"], base["ops_per_sec"])
+        p50 = _change(row["p50_s"], base["p50_s"])
+        p99 = _change(row["p99_s"], base["p99_s"])
+        memory = row["peak_bytes"] - base["peak_bytes"]
+        memory_rel = memory / base["peak_bytes"] if base["peak_bytes"] else 0.0
+        flags = []
+        if speed is not None and speed < -threshold:
+            flags.append("SLOWER")
+            regressions.append(f"{key[0]}[{key[1]}]: ops/sec {speed:+.1%} (threshold -{threshold:.0%})")
+        if memory > MEMORY_SLACK_BYTES and memory_rel > memory_threshold:
+            flags.append("MEMORY")
+            regressions.append(
+                f"{key[0]}[{key[1]}]: peak memory {memory_rel:+.1%} ({memory:+,} bytes, threshold +{memory_threshold:.0%})"
+            )
+        line = (
+            f"{key[0]:<48} {key[1]:>6}  {_percent(speed, 9)}  {_percent(p50, 8)}  {_percent(p99, 8)}  "
+            f"{memory_rel:>+9.1%}  {' '.join(flags)}"
+        )
+        print(line.rstrip())
+    for benchmark, size in base_rows:
+        print(f"{benchmark:<48} {size:>6}  (missing from current run)")
+        regressions.append(f"{benchmark}[{size}]: missing from current run")
+    return regressions
+
+
+def _change(value: float, base: float) -> Optional[float]:
+    """Relative change of ``value`` over ``base``; None when a zero baseline makes it incomparable."""
+    return value / base - 1 if base else None
+
+
+def _percent(change: Optional[float], width: int) -> str:
+    return f"{'n/a':>{width}}" if change is None else f"{change:>+{width}.1%}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths and track regressions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and save results as JSON")
+    run.add_argument("-o", "--output", default="benchmarks.json", help="results file (default benchmarks.json)")
+    run.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    run.add_argument("--max-time", type=float, default=DEFAULT_MAX_TIME, help="seconds of timing per case")
+    run.add_argument("--min-sample", type=float, default=DEFAULT_MIN_SAMPLE, help="minimum seconds per timing sample")
+    run.add_argument("--list", action="store_true", help="list benchmarks and sizes, then exit")
+
+    cmp = commands.add_parser("compare", help="flag regressions of a results file against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative ops/sec drop")
+    cmp.add_argument("--memory-threshold", type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                     help="allowed relative peak-memory growth")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        if args.list:
+            for bench in BENCHMARKS:
+                print(f"{bench.name:<48} sizes {', '.join(map(str, bench.sizes))} ({bench.unit})")
+            return 0
+        document = run_suite(name_filter=args.filter, max_time=args.max_time, min_sample=args.min_sample)
+        save_results(document, args.output)
+        print(f"Saved {len(document['results'])} results to {args.output}")
+        return 0
+
+    regressions = compare(load_results(args.baseline), load_results(args.current),
+                          args.threshold, args.memory_threshold)
+    for message in regressions:
+        print(message, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Startup-time budget check for the simulation modules.
+
+Imports each module in a fresh interpreter, takes the best of several
+runs, and fails (exit status 1) if the import exceeds its budget or pulls
+in a heavy dependency the module is meant to load lazily.
+
+Usage:
+    python check_startup.py             # check every module in STARTUP_BUDGETS
+    python check_startup.py --runs 10 --scale 2.0
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# module -> (import budget in seconds, modules that must not be loaded by the import).
+# Budgets are ~1.3x the measured best-of-runs times (numpy-backed modules
+# ~125 ms); the chip module measures ~1.3 ms, so its budget sits a little
+# above the timer noise while still failing on any eager numpy import.
+# Use --scale on slower hosts.
+STARTUP_BUDGETS = {
+    "energy_photon_chip_design": (0.003, ("matplotlib", "scipy", "numpy")),
+    "gas_stream": (0.165, ("matplotlib", "scipy")),
+    "waveguide_simulation": (0.165, ("matplotlib", "scipy")),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": sorted(m for m in {forbidden!r} if m in sys.modules)}}))
+"""
+
+
+def measure_import(module, forbidden=(), runs=5):
+    """Best-of-``runs`` import time of ``module`` and the forbidden modules it loaded."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get("PYTHONPATH")])))
+    best = None
+    loaded = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, forbidden=tuple(forbidden))],
+            capture_output=True, text=True, check=True, cwd=here, env=env,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        best = result["elapsed"] if best is None else min(best, result["elapsed"])
+        loaded = result["loaded"]
+    return best, loaded
+
+
+def check(runs=5, scale=1.0, budgets=STARTUP_BUDGETS):
+    """Return a list of failure messages (empty when every module is within budget)."""
+    failures = []
+    for module, (budget, forbidden) in budgets.items():
+        elapsed, loaded = measure_import(module, forbidden, runs)
+        limit = budget * scale
+        status = "ok" if elapsed <= limit and not loaded else "FAIL"
+        print(f"{module:<28} {elapsed * 1000:8.1f} ms  (budget {limit * 1000:.0f} ms)  {status}")
+        if elapsed > limit:
+            failures.append(f"{module}: import took {elapsed:.3f}s, budget {limit:.3f}s")
+        if loaded:
+            failures.append(f"{module}: eagerly imported {', '.join(loaded)}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enforce import-time budgets for the simulation modules.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module (best time counts)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. for slow CI hosts")
+    args = parser.parse_args(argv)
+    failures = check(args.runs, args.scale)
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+"""
+Checkpoint/resume for long device runs.
+
+A checkpoint holds the state of one QuantumPhotonDevice (device scalars,
+every DopedLayer and the incremental-mode caches), any number of
+PhotonicChip instances (chip fields plus RegisterFile state), the offset
+into the input stream and a free-form ``extra`` dict. It is an
+uncompressed ``.npz``: per-chip state is one structured array, so
+capturing thousands of chips is a handful of NumPy conversions rather
+than per-object pickling.
+
+Capturing is synchronous and cheap (it copies state into fresh arrays);
+serializing and writing happen on a background thread. Files are written
+to a temporary name, fsynced and renamed over the previous checkpoint, so
+a crash leaves either the old or the new checkpoint, never a torn one.
+Register access traces and attached sinks/handlers/metrics are not saved.
+
+Usage:
+    for result in run_checkpointed(device, voltage_stream, "run.ckpt", every=10_000):
+        ...
+    # after a crash, the same call restores the device and skips the
+    # inputs already processed
+
+    ckpt = Checkpointer("fleet.ckpt", chips=chips, interval=30.0)
+    for offset, gas in enumerate(gas_values, 1):
+        ...
+        ckpt.step(offset)
+    ckpt.close()
+"""
+
+import io
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from operator import attrgetter
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from energy_photon_chip_design import PhotonicChip
+from rose_quartz import CycleResult, QuantumPhotonDevice
+
+CHECKPOINT_FORMAT = "photon-checkpoint"
+CHECKPOINT_VERSION = 2        # 2: float photon_scaling, signed last_photons high word
+
+_U64_MASK = (1 << 64) - 1
+
+CHIP_STATE_DTYPE = np.dtype([
+    ("wavelength_m", "<f8"),
+    ("efficiency", "<f8"),
+    ("temperature_K", "<f8"),
+    ("photon_scaling", "<f8"),
+    ("photon_scaling_is_float", "?"),   # Restored as int unless the chip held a float
+    ("mode", "u1"),
+    ("gas_input", "<i8"),
+    ("error_flags", "u1"),
+    ("interrupt_enabled", "?"),
+    ("cycle", "<i8"),
+    ("busy", "?"),
+    ("irq_pending", "?"),
+    ("emissions", "<i8"),
+    ("n_bands", "<u2"),
+    ("has_last_photons", "?"),
+    ("last_photons_lo", "<u8"),   # last_photons may exceed int64; stored as a 128-bit
+    ("last_photons_hi", "<i8"),   # two's-complement value, low word unsigned, high word signed
+])
+
+# Chip attributes stored directly, in CHIP_STATE_DTYPE order
+_CHIP_FIELDS = (
+    "_wavelength", "efficiency", "_temperature", "photon_scaling", "mode", "gas_input",
+    "error_flags", "interrupt_enabled", "registers.cycle", "registers.busy",
+    "registers.irq_pending", "registers.emissions",
+)
+_STATE_FIELDS = tuple(name for name in CHIP_STATE_DTYPE.names if name != "photon_scaling_is_float")
+_chip_getter = attrgetter(*_CHIP_FIELDS, "_wavelengths", "registers.last_photons")
+
+# NaN stands for None in the optional float fields
+LAYER_STATE_DTYPE = np.dtype([
+    ("voltage_tolerance", "<f8"),
+    ("voltage_effect", "<f8"),
+    ("active_voltage", "<f8"),
+    ("shifted_wavelength", "<f8"),
+    ("photon_energy", "<f8"),
+])
+
+_DEVICE_FIELDS = (
+    "gain_medium", "photovoltaic_type", "tpv_type", "pv_eff", "tpv_eff", "gain_factor",
+    "energy_collected", "units", "incremental", "voltage_epsilon",
+)
+
+
+class CheckpointFormatError(ValueError):
+    """Raised when a file is not a readable checkpoint."""
+
+
+class Checkpoint(NamedTuple):
+    offset: int                    # Inputs consumed when the checkpoint was taken
+    extra: dict
+    created: float
+    device: Optional[dict]         # Device scalars, dopants and incremental state
+    layers: Optional[np.ndarray]   # LAYER_STATE_DTYPE, one per DopedLayer
+    inc_voltages: Optional[np.ndarray]
+    chips: Optional[np.ndarray]    # CHIP_STATE_DTYPE, one per PhotonicChip
+    bands: Optional[np.ndarray]    # Concatenated chip.wavelengths, split by chips["n_bands"]
+
+
+def _opt(value):
+    return math.nan if value is None else value
+
+
+def _unopt(value):
+    return None if math.isnan(value) else value
+
+
+# === Capture ===
+def capture_chips(chips: List[PhotonicChip]):
+    """(CHIP_STATE_DTYPE array, concatenated band wavelengths) for a list of chips."""
+    n = len(chips)
+    state = np.empty(n, dtype=CHIP_STATE_DTYPE)
+    if not n:
+        return state, np.empty(0)
+    # One attribute sweep over the chips, then column-wise conversion
+    columns = list(zip(*map(_chip_getter, chips)))
+    for name, column in zip(_STATE_FIELDS[:len(_CHIP_FIELDS)], columns):
+        state[name] = column
+    state["photon_scaling_is_float"] = [isinstance(v, float) for v in columns[_CHIP_FIELDS.index("photon_scaling")]]
+    bands, last = columns[-2], columns[-1]
+    state["n_bands"] = [len(b) for b in bands]
+    state["has_last_photons"] = [p is not None for p in last]
+    last = [0 if p is None else int(p) for p in last]
+    state["last_photons_lo"] = [p & _U64_MASK for p in last]
+    state["last_photons_hi"] = [p >> 64 for p in last]
+    return state, np.fromiter(itertools.chain.from_iterable(bands), dtype=np.float64)
+
+
+def capture_device(device: QuantumPhotonDevice):
+    """(device dict, LAYER_STATE_DTYPE array, incremental voltages) for one device."""
+    layers = device.chip.layers
+    layer_state = np.array(
+        [(layer.voltage_tolerance, layer.voltage_effect, _opt(layer.active_voltage),
+          _opt(layer.shifted_wavelength), _opt(layer.photon_energy)) for layer in layers],
+        dtype=LAYER_STATE_DTYPE,
+    )
+    info = {name: getattr(device, name) for name in _DEVICE_FIELDS}
+    info["dopants"] = [dict(layer.dopant) for layer in layers]
+    cached = device._inc_voltages
+    info["inc"] = None if cached is None else {
+        "gain": device._inc_gain, "units": device._inc_units, "pv": device._inc_pv,
+        "tpv": device._inc_tpv, "since_resync": device._inc_since_resync,
+    }
+    inc_voltages = np.array([_opt(v) for v in cached], dtype=np.float64) if cached is not None else np.empty(0)
+    return info, layer_state, inc_voltages
+
+
+def capture(
+    device: Optional[QuantumPhotonDevice] = None,
+    chips: Optional[List[PhotonicChip]] = None,
+    offset: int = 0,
+    extra: Optional[dict] = None,
+) -> Checkpoint:
+    """Copy the current state into a Checkpoint, ready to write from any thread."""
+    device_info = layers = inc_voltages = chip_state = bands = None
+    if device is not None:
+        device_info, layers, inc_voltages = capture_device(device)
+    if chips is not None:
+        chip_state, bands = capture_chips(chips)
+    return Checkpoint(int(offset), dict(extra or {}), time.time(), device_info, layers, inc_voltages, chip_state, bands)
+
+
+# === Files ===
+def write_checkpoint(path: str, checkpoint: Checkpoint):
+    """Serialize and atomically replace ``path``."""
+    meta = {
+        "format": CHECKPOINT_FORMAT, "version": CHECKPOINT_VERSION, "offset": checkpoint.offset,
+        "created": checkpoint.created, "extra": checkpoint.extra, "device": checkpoint.device,
+    }
+    arrays = {"meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8)}
+    for name in ("layers", "inc_voltages", "chips", "bands"):
+        value = getattr(checkpoint, name)
+        if value is not None:
+            arrays[name] = value
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(buffer.getbuffer())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+    except (OSError, ValueError) as exc:
+        raise CheckpointFormatError(f"{path}: not a checkpoint ({exc})") from exc
+    if "meta" not in arrays:
+        raise CheckpointFormatError(f"{path}: missing metadata")
+    meta = json.loads(arrays["meta"].tobytes().decode("utf-8"))
+    if meta.get("format") != CHECKPOINT_FORMAT:
+        raise CheckpointFormatError(f"{path}: not a checkpoint")
+    if meta.get("version") != CHECKPOINT_VERSION:
+        raise CheckpointFormatError(f"{path}: unsupported checkpoint version {meta.get('version')}")
+    return Checkpoint(
+        meta["offset"], meta["extra"], meta["created"], meta["device"],
+        arrays.get("layers"), arrays.get("inc_voltages"), arrays.get("chips"), arrays.get("bands"),
+    )
+
+
+# === Restore ===
+def restore_chips(checkpoint: Checkpoint, chips: Optional[List[PhotonicChip]] = None) -> List[PhotonicChip]:
+    """
+    Load chip state into ``chips`` (same count as saved) or into new
+    PhotonicChip instances. Interrupt handlers and traces are left as they are.
+    """
+    state = checkpoint.chips
+    if state is None:
+        raise CheckpointFormatError("checkpoint holds no chip state")
+    if chips is None:
+        chips = [PhotonicChip(register_trace_capacity=0) for _ in range(len(state))]
+    elif len(chips) != len(state):
+        raise ValueError(f"checkpoint holds {len(state)} chips, got {len(chips)}")
+    columns = {name: state[name].tolist() for name in CHIP_STATE_DTYPE.names}
+    offsets = np.concatenate(([0], np.cumsum(state["n_bands"], dtype=np.int64))).tolist()
+    bands = checkpoint.bands.tolist()
+    for i, chip in enumerate(chips):
+        chip.wavelength = columns["wavelength_m"][i]
+        chip.wavelengths = bands[offsets[i]:offsets[i + 1]]
+        chip.efficiency = columns["efficiency"][i]
+        chip.temperature = columns["temperature_K"][i]
+        scaling = columns["photon_scaling"][i]
+        chip.photon_scaling = scaling if columns["photon_scaling_is_float"][i] else int(scaling)
+        chip.mode = columns["mode"][i]
+        chip.gas_input = columns["gas_input"][i]
+        chip.error_flags = columns["error_flags"][i]
+        chip.interrupt_enabled = columns["interrupt_enabled"][i]
+        registers = chip.registers
+        registers.cycle = columns["cycle"][i]
+        registers.busy = columns["busy"][i]
+        registers.irq_pending = columns["irq_pending"][i]
+        registers.emissions = columns["emissions"][i]
+        registers.last_photons = (
+            columns["last_photons_lo"][i] | (columns["last_photons_hi"][i] << 64)
+            if columns["has_last_photons"][i] else None
+        )
+    return chips
+
+
+def restore_device(checkpoint: Checkpoint, device: QuantumPhotonDevice) -> QuantumPhotonDevice:
+    """
+    Load device and layer state into ``device``, whose chip must have the
+    saved dopant layers. Incremental caches are rebuilt from the layer
+    state, so the next cycle continues exactly where the saved run stopped.
+    """
+    info = checkpoint.device
+    if info is None:
+        raise CheckpointFormatError("checkpoint holds no device state")
+    layers = device.chip.layers
+    saved = [_dopant_from_json(d) for d in info["dopants"]]
+    if [layer.dopant for layer in layers] != saved:
+        raise ValueError("device dopant layers do not match the checkpoint")
+    for name in _DEVICE_FIELDS:
+        setattr(device, name, info[name])
+    for layer, row in zip(layers, checkpoint.layers.tolist()):
+        layer.voltage_tolerance, layer.voltage_effect = row[0], row[1]
+        layer.active_voltage, layer.shifted_wavelength, layer.photon_energy = map(_unopt, row[2:])
+
+    device.reset_incremental()
+    inc = info["inc"]
+    if inc is not None:
+        units = inc["units"]
+        gain = inc["gain"]
+        voltages = [_unopt(v) for v in checkpoint.inc_voltages.tolist()]
+        emissions = [layer.emission(units) for layer in layers[:len(voltages)]]
+        for e in emissions:
+            if e is not None:
+                e.energy *= gain
+        device._inc_voltages = voltages
+        device._inc_emissions = emissions
+        device._inc_emission_list = [e for e in emissions if e is not None]
+        device._inc_gain = gain
+        device._inc_units = units
+        device._inc_pv = inc["pv"]
+        device._inc_tpv = inc["tpv"]
+        device._inc_since_resync = inc["since_resync"]
+    return device
+
+
+def _dopant_from_json(dopant: dict) -> dict:
+    # JSON turns the spectrum tuple into a list
+    return {key: tuple(value) if isinstance(value, list) else value for key, value in dopant.items()}
+
+
+def resume(
+    path: str,
+    device: Optional[QuantumPhotonDevice] = None,
+    chips: Optional[List[PhotonicChip]] = None,
+) -> Optional[Checkpoint]:
+    """Restore from ``path`` if it exists; returns the checkpoint or None."""
+    if not os.path.exists(path):
+        return None
+    checkpoint = load_checkpoint(path)
+    if device is not None:
+        restore_device(checkpoint, device)
+    if chips is not None:
+        restore_chips(checkpoint, chips)
+    return checkpoint
+
+
+# === Background writer ===
+class Checkpointer:
+    """
+    Periodic checkpoints on a background thread. Call ``step(offset)`` after
+    each input; a checkpoint is captured every ``every`` inputs and/or every
+    ``interval`` seconds. If a write is still in progress, the next capture
+    replaces any checkpoint still waiting, so the writer never falls behind.
+    Errors from the writer are re-raised by the next step/save/flush.
+    """
+    def __init__(
+        self,
+        path: str,
+        device: Optional[QuantumPhotonDevice] = None,
+        chips: Optional[List[PhotonicChip]] = None,
+        every: Optional[int] = None,
+        interval: Optional[float] = None,
+        offset: int = 0,
+    ):
+        """``offset`` is where the input stream starts (non-zero when resuming)."""
+        self.path = path
+        self.device = device
+        self.chips = chips
+        self.every = every
+        self.interval = interval
+        self.written = 0
+        self._last_offset = offset
+        self._last_time = time.monotonic()
+        self._pending: Optional[Checkpoint] = None
+        self._writing = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        cond = self._cond
+        while True:
+            with cond:
+                while self._pending is None and not self._closed:
+                    cond.wait()
+                if self._pending is None:
+                    return
+                checkpoint, self._pending = self._pending, None
+                self._writing = True
+            try:
+                write_checkpoint(self.path, checkpoint)
+            except BaseException as exc:
+                with cond:
+                    self._error = exc
+            with cond:
+                self._writing = False
+                if self._error is None:
+                    self.written += 1
+                cond.notify_all()
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def save(self, offset: int, extra: Optional[dict] = None, wait: bool = False):
+        """Capture now and queue the write."""
+        self._raise_pending_error()
+        checkpoint = capture(self.device, self.chips, offset, extra)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("checkpointer is closed")
+            self._pending = checkpoint
+            self._cond.notify_all()
+        self._last_offset = offset
+        self._last_time = time.monotonic()
+        if wait:
+            self.flush()
+
+    def step(self, offset: int, extra: Optional[dict] = None) -> bool:
+        """Checkpoint if one is due at ``offset``; returns True when one was captured."""
+        due = self.every is not None and offset - self._last_offset >= self.every
+        if not due and self.interval is not None:
+            due = time.monotonic() - self._last_time >= self.interval
+        if due:
+            self.save(offset, extra)
+        return due
+
+    def flush(self):
+        """Block until every queued checkpoint is on disk."""
+        with self._cond:
+            while self._pending is not None or self._writing:
+                self._cond.wait()
+        self._raise_pending_error()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._raise_pending_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_checkpointed(
+    device: QuantumPhotonDevice,
+    voltage_stream: Iterable[List[float]],
+    path: str,
+    every: int = 10_000,
+    interval: Optional[float] = None,
+) -> Iterator[CycleResult]:
+    """
+    QuantumPhotonDevice.run_cycles with checkpoints. If ``path`` exists, the
+    device is restored and the inputs it already consumed are skipped, so
+    re-running after a crash continues the original sequence. A final
+    checkpoint is written when the stream is exhausted.
+    """
+    checkpoint = resume(path, device)
+    offset = checkpoint.offset if checkpoint is not None else 0
+    stream = itertools.islice(voltage_stream, offset, None)
+    with Checkpointer(path, device, every=every, interval=interval, offset=offset) as ckpt:
+        for input_voltages in stream:
+            result = device.execute_cycle(input_voltages)
+            offset += 1
+            yield result
+            ckpt.step(offset)
+        ckpt.save(offset)
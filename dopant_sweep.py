@@ -0,0 +1,163 @@
+"""
+Parallel parameter sweeps over the dopant-layer QuantumPhotonDevice.
+
+A sweep evaluates the batched device model (QuantumPhotonDevice.run_batch)
+for every point of a parameter grid against one shared block of applied
+voltages. Grid points are packed into float arrays and split into chunks
+across a ProcessPoolExecutor; the voltages and dopant table are shipped to
+each worker once through the pool initializer, and workers hand back one
+row of floats per grid point, never per-cycle records.
+
+Usage:
+    grid = parameter_grid(voltage_tolerance=[0.1, 0.2], gain_factor=[1.5, 2.0])
+    table = run_sweep(grid, voltages)
+    best = table[np.argmax(table["energy_collected"])]
+"""
+
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from rose_quartz import (
+    DEFAULT_TOLERANCE,
+    DOPANT_LAYERS,
+    VOLTAGE_EFFECT,
+    QuantumPhotonChip,
+    QuantumPhotonDevice,
+)
+
+# Swept parameters, in the column order used for worker payloads
+SWEEP_PARAMETERS = ("voltage_tolerance", "voltage_effect", "gain_factor", "pv_eff", "tpv_eff")
+
+# Values used for any parameter the grid leaves out
+SWEEP_DEFAULTS = {
+    "voltage_tolerance": DEFAULT_TOLERANCE,
+    "voltage_effect": VOLTAGE_EFFECT,
+    "gain_factor": 2.0,
+    "pv_eff": 0.27,
+    "tpv_eff": 0.16,
+}
+
+# Per-process state installed by _init_worker
+_worker_state = {}
+
+
+def parameter_grid(**axes: Iterable[float]) -> np.ndarray:
+    """
+    Cartesian product of the given parameter axes as a (N_points x 5) array
+    in SWEEP_PARAMETERS column order. Omitted parameters take SWEEP_DEFAULTS.
+    """
+    unknown = set(axes) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown sweep parameters: {sorted(unknown)}")
+    values = [list(axes.get(name, [SWEEP_DEFAULTS[name]])) for name in SWEEP_PARAMETERS]
+    return np.array(list(itertools.product(*values)), dtype=np.float64).reshape(-1, len(SWEEP_PARAMETERS))
+
+
+def sweep_dtype(n_layers: int) -> np.dtype:
+    """Row layout of the reduced sweep table."""
+    return np.dtype(
+        [(name, np.float64) for name in SWEEP_PARAMETERS]
+        + [
+            ("energy_collected", np.float64),
+            ("mean_elec_output", np.float64),
+            ("recycled_total", np.int64),
+            ("activation_rate", np.float64, (n_layers,)),
+        ]
+    )
+
+
+def evaluate_point(params, voltages: np.ndarray, dopants: List[dict] = DOPANT_LAYERS, units: str = "eV") -> np.ndarray:
+    """
+    Run one grid point over the whole voltage block.
+    Returns [energy_collected, mean_elec_output, recycled_total, *activation_rate].
+    """
+    tolerance, effect, gain, pv_eff, tpv_eff = (float(p) for p in params)
+    chip = QuantumPhotonChip(dopants, voltage_tolerance=tolerance, voltage_effect=effect)
+    device = QuantumPhotonDevice(chip, pv_eff=pv_eff, tpv_eff=tpv_eff, gain_factor=gain, units=units)
+    batch = device.run_batch(voltages)
+    n_samples = len(batch)
+    mean_elec = float(batch.elec_output.mean()) if n_samples else 0.0
+    activation = batch.active.mean(axis=0) if n_samples else np.zeros(len(dopants))
+    return np.concatenate(([device.energy_collected, mean_elec, float(batch.recycled.sum())], activation))
+
+
+def _init_worker(voltages: np.ndarray, dopants: List[dict], units: str):
+    _worker_state["voltages"] = voltages
+    _worker_state["dopants"] = dopants
+    _worker_state["units"] = units
+
+
+def _run_chunk(points: np.ndarray) -> np.ndarray:
+    voltages = _worker_state["voltages"]
+    dopants = _worker_state["dopants"]
+    units = _worker_state["units"]
+    return np.stack([evaluate_point(p, voltages, dopants, units) for p in points])
+
+
+def _reduce(points: np.ndarray, rows: np.ndarray, n_layers: int) -> np.ndarray:
+    table = np.empty(len(points), dtype=sweep_dtype(n_layers))
+    for col, name in enumerate(SWEEP_PARAMETERS):
+        table[name] = points[:, col]
+    table["energy_collected"] = rows[:, 0]
+    table["mean_elec_output"] = rows[:, 1]
+    table["recycled_total"] = rows[:, 2].astype(np.int64)
+    table["activation_rate"] = rows[:, 3:]
+    return table
+
+
+def run_sweep(
+    grid: np.ndarray,
+    voltages,
+    dopants: List[dict] = DOPANT_LAYERS,
+    units: str = "eV",
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Evaluate every row of ``grid`` (see parameter_grid) over ``voltages``,
+    an (N_samples x N_layers) array, and reduce the results into a single
+    structured table (see sweep_dtype), one row per grid point in grid order.
+
+    ``max_workers`` defaults to the CPU count; 1 runs in-process. By default
+    the grid is cut into about four chunks per worker to balance load.
+    """
+    points = np.asarray(grid, dtype=np.float64).reshape(-1, len(SWEEP_PARAMETERS))
+    volts = np.ascontiguousarray(voltages, dtype=np.float64)
+    if volts.ndim == 1:
+        volts = volts[np.newaxis, :]
+    n_layers = len(dopants)
+    if len(points) == 0:
+        return np.empty(0, dtype=sweep_dtype(n_layers))
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(volts, dopants, units)
+        return _reduce(points, _run_chunk(points), n_layers)
+
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(points) / (workers * 4)))
+    chunks = [points[i:i + chunk_size] for i in range(0, len(points), chunk_size)]
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(volts, dopants, units)
+    ) as pool:
+        rows = np.concatenate(list(pool.map(_run_chunk, chunks)))
+    return _reduce(points, rows, n_layers)
+
+
+def table_to_records(table: np.ndarray, dopants: List[dict] = DOPANT_LAYERS) -> List[Dict[str, float]]:
+    """Flatten a sweep table into dicts, with one activation column per dopant name."""
+    records = []
+    for row in table:
+        record = {name: float(row[name]) for name in SWEEP_PARAMETERS}
+        record["energy_collected"] = float(row["energy_collected"])
+        record["mean_elec_output"] = float(row["mean_elec_output"])
+        record["recycled_total"] = int(row["recycled_total"])
+        for dopant, rate in zip(dopants, row["activation_rate"]):
+            record[f"activation_{dopant['name']}"] = float(rate)
+        records.append(record)
+    return records
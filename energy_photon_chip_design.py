@@ -15,6 +15,7 @@ class QuantumPhotonChip:
         self.error_flags = 0b00000000
         self.interrupt_enabled = False
         self.efficiency = 0.85
+        self.registers = RegisterFile(self)
 
         # Multi-frequency setup
         self.wavelengths = [850e-9, 700e-9]
@@ -39,28 +40,15 @@ class QuantumPhotonChip:
         print(f"Gas Used: {self.gas_input}, Photons Emitted: {photons_emitted:.2f}")
         return photons_emitted
 
+    def register_emission(self, gas_units):
+        """Emission triggered through the register file."""
+        return self.adjusted_photon_yield(gas_units) * self.photon_scaling
+
     def update_registers(self, addr, value):
-        if addr == 0x00:
-            self.mode = value
-        elif addr == 0x01:
-            self.gas_input = (self.gas_input & 0xFF00) | value
-        elif addr == 0x02:
-            self.gas_input = (self.gas_input & 0x00FF) | (value << 8)
-        elif addr == 0x03:
-            self.photon_scaling = value
-        elif addr == 0x06:
-            self.interrupt_enabled = bool(value)
+        self.registers.write(addr, value)
 
     def read_register(self, addr):
-        if addr == 0x00:
-            return self.mode
-        elif addr == 0x04:
-            return 1  # Assume emission complete for demo
-        elif addr == 0x05:
-            return self.error_flags
-        elif addr == 0x06:
-            return int(self.interrupt_enabled)
-        return 0
+        return self.registers.read(addr)
 
 
 # Suggested SPI Register Map (for documentation/reference)
@@ -134,6 +122,7 @@ import math
 import os
 import sys
 import time
+from functools import lru_cache
 
 # Constants for physics and chip specs
 PLANCK_CONSTANT = 6.62607015e-34  # Js
@@ -144,6 +133,7 @@ PHOTON_WAVELENGTH_NM = 850
 PHOTON_WAVELENGTH_M = PHOTON_WAVELENGTH_NM * 1e-9
 PHOTON_SCALING_DEFAULT = 42
 TEMPERATURE_DEFAULT = 300  # K
+THERMAL_CACHE_SIZE = 4096  # Distinct temperatures kept by thermal_loss_at
 
 # SPI Register Map Emulation
 SPI_REGISTER_MAP = {
@@ -172,6 +162,263 @@ def print_benchmark_table():
             entry["operation"], entry["gas"], entry["photons"], entry["energy_uJ"]))
     print("-----------------------------------------------\n")
 
+# === SPI Register File ===
+# EMISSION_STATUS bits
+STATUS_READY = 0x01       # No emission outstanding
+STATUS_BUSY = 0x02        # Gas latched, waiting for a START command (Manual mode)
+STATUS_ERROR = 0x04       # At least one ERROR_FLAGS bit is set
+STATUS_IRQ = 0x08         # Interrupt pending; cleared by reading EMISSION_STATUS
+
+# ERROR_FLAGS bits (write 1 to clear)
+ERR_OVERFLOW = 0x01       # Written value did not fit in 8 bits
+ERR_READ_ONLY = 0x02      # Write to a read-only register
+ERR_BAD_ADDRESS = 0x04    # Access to an unmapped address
+ERR_THERMAL_LIMIT = 0x08  # Emission ran with the thermal loss clamped at its floor
+
+CONTROL_START = 0x80      # MODE_SELECT bit 7: start emission of the latched gas
+SPI_FRAME_CYCLES = 16     # SCLK cycles per address + data byte frame
+TRACE_CAPACITY_DEFAULT = 0  # Access tracing is opt-in; e.g. 1 << 16 for a 64K-entry ring
+
+# Access trace record (op: 0 = read, 1 = write). addr/value are signed and
+# wider than the bus so rejected accesses are logged as issued; anything past
+# the int32 range is clamped, which still fails the same checks on replay.
+# TRACE_DTYPE is built on first use (see __getattr__) so importing this
+# module skips numpy.
+TRACE_FIELDS = [("cycle", "<u8"), ("op", "u1"), ("addr", "<i4"), ("value", "<i4")]
+TRACE_INT_MIN, TRACE_INT_MAX = -(1 << 31), (1 << 31) - 1
+
+
+@lru_cache(maxsize=None)
+def _trace_dtype():
+    import numpy as np
+    return np.dtype(TRACE_FIELDS)
+
+
+def _trace_int(x):
+    return min(max(x, TRACE_INT_MIN), TRACE_INT_MAX)
+
+
+class RegisterFile:
+    """
+    SPI register file for a chip, dispatched through SPI_REGISTER_MAP.
+
+    Register state stays on the chip (mode, gas_input, photon_scaling,
+    error_flags, interrupt_enabled) so existing attribute access keeps
+    working. In Auto mode a GAS_INPUT_HIGH write commits the 16-bit gas value
+    and emits immediately; in Manual mode it sets BUSY until MODE_SELECT is
+    written with CONTROL_START. Emission goes through the chip's
+    ``register_emission(gas_units)``.
+
+    Every access advances ``cycle`` by SPI_FRAME_CYCLES and, when
+    ``trace_capacity`` > 0, is recorded in a TRACE_DTYPE ring buffer that is
+    allocated on the first traced access (see ``trace``).
+    """
+    def __init__(self, chip, trace_capacity=TRACE_CAPACITY_DEFAULT):
+        self.chip = chip
+        self.cycle = 0
+        self.busy = False
+        self.irq_pending = False
+        self.emissions = 0
+        self.last_photons = None
+        self.interrupt_handler = None  # Called as handler(register_file, cause)
+
+        self._readers = [None] * 256
+        self._writers = [None] * 256
+        for addr, name in SPI_REGISTER_MAP.items():
+            self._readers[addr] = getattr(self, f"_read_{name.lower()}")
+            self._writers[addr] = getattr(self, f"_write_{name.lower()}", self._write_read_only)
+
+        self.trace_capacity = trace_capacity
+        self._trace = None
+        self._trace_count = 0
+
+    # --- Bus access ---
+    def write(self, addr, value):
+        self.cycle += SPI_FRAME_CYCLES
+        writer = self._writers[addr] if 0 <= addr < 256 else None
+        overflow = not 0 <= value <= 0xFF
+        if self.trace_capacity:
+            self._record(1, addr if writer is not None else _trace_int(addr), _trace_int(value) if overflow else value)
+        if writer is None:
+            self.raise_error(ERR_BAD_ADDRESS)
+            return
+        if overflow:
+            self.raise_error(ERR_OVERFLOW)
+            value &= 0xFF
+        writer(value)
+
+    def read(self, addr):
+        self.cycle += SPI_FRAME_CYCLES
+        reader = self._readers[addr] if 0 <= addr < 256 else None
+        if reader is None:
+            self.raise_error(ERR_BAD_ADDRESS)
+            addr = _trace_int(addr)
+            value = 0
+        else:
+            value = reader()
+        if self.trace_capacity:
+            self._record(0, addr, value)
+        return value
+
+    def transact(self, ops):
+        """
+        Apply a list of (addr, value) operations in order; value None is a
+        read. Returns the read values, in order.
+        """
+        write = self.write
+        read = self.read
+        results = []
+        for addr, value in ops:
+            if value is None:
+                results.append(read(addr))
+            else:
+                write(addr, value)
+        return results
+
+    # --- Status and interrupts ---
+    def raise_error(self, flag):
+        new = flag & ~self.chip.error_flags
+        self.chip.error_flags |= flag
+        if new:
+            self._interrupt("error")
+
+    def _interrupt(self, cause):
+        if self.chip.interrupt_enabled:
+            self.irq_pending = True
+            if self.interrupt_handler is not None:
+                self.interrupt_handler(self, cause)
+
+    def status(self):
+        """EMISSION_STATUS value without the read side effect."""
+        value = STATUS_BUSY if self.busy else STATUS_READY
+        if self.chip.error_flags:
+            value |= STATUS_ERROR
+        if self.irq_pending:
+            value |= STATUS_IRQ
+        return value
+
+    def emit(self):
+        """Run the emission for the latched gas value."""
+        self.complete_emission(self.chip.register_emission(self.chip.gas_input))
+
+    def complete_emission(self, photons):
+        """
+        Finish an emission: update state and raise the completion interrupt.
+        Time-domain simulators call this after the emission latency.
+        """
+        self.last_photons = photons
+        self.busy = False
+        self.emissions += 1
+        if self.chip.thermal_loss_factor() <= 0.1:
+            self.raise_error(ERR_THERMAL_LIMIT)
+        self._interrupt("emission")
+
+    # --- Register handlers (named after SPI_REGISTER_MAP entries) ---
+    def _read_mode_select(self):
+        return self.chip.mode
+
+    def _write_mode_select(self, value):
+        self.chip.mode = value & ~CONTROL_START
+        if value & CONTROL_START:
+            self.emit()
+
+    def _read_gas_input_low(self):
+        return self.chip.gas_input & 0xFF
+
+    def _write_gas_input_low(self, value):
+        self.chip.gas_input = (self.chip.gas_input & 0xFF00) | value
+
+    def _read_gas_input_high(self):
+        return (self.chip.gas_input >> 8) & 0xFF
+
+    def _write_gas_input_high(self, value):
+        self.chip.gas_input = (self.chip.gas_input & 0x00FF) | (value << 8)
+        if self.chip.mode == 1:
+            self.emit()
+        else:
+            self.busy = True
+
+    def _read_photon_scaling(self):
+        return self.chip.photon_scaling
+
+    def _write_photon_scaling(self, value):
+        self.chip.photon_scaling = value
+
+    def _read_emission_status(self):
+        value = self.status()
+        self.irq_pending = False
+        return value
+
+    def _read_error_flags(self):
+        return self.chip.error_flags
+
+    def _write_error_flags(self, value):
+        self.chip.error_flags &= ~value
+
+    def _read_interrupt_enable(self):
+        return int(self.chip.interrupt_enabled)
+
+    def _write_interrupt_enable(self, value):
+        self.chip.interrupt_enabled = bool(value)
+
+    def _write_read_only(self, value):
+        self.raise_error(ERR_READ_ONLY)
+
+    # --- Access trace ---
+    def _record(self, op, addr, value):
+        ring = self._trace
+        if ring is None:
+            import numpy as np
+            ring = self._trace = np.zeros(self.trace_capacity, dtype=_trace_dtype())
+        ring[self._trace_count % self.trace_capacity] = (self.cycle, op, addr, value)
+        self._trace_count += 1
+
+    def trace(self):
+        """Recorded accesses, oldest first, as a TRACE_DTYPE array."""
+        import numpy as np
+        count = self._trace_count
+        if not count:
+            return np.zeros(0, dtype=_trace_dtype())
+        cap = self.trace_capacity
+        if count <= cap:
+            return self._trace[:count].copy()
+        start = count % cap
+        return np.concatenate((self._trace[start:], self._trace[:start]))
+
+    def clear_trace(self):
+        self._trace_count = 0
+
+    def replay(self, trace):
+        """
+        Re-issue the accesses of a TRACE_DTYPE array against this register
+        file. Returns a boolean array, one entry per read, that is True where
+        the read value matches the recorded one.
+        """
+        import numpy as np
+        write = self.write
+        read = self.read
+        matches = []
+        for op, addr, value in zip(trace["op"].tolist(), trace["addr"].tolist(), trace["value"].tolist()):
+            if op:
+                write(addr, value)
+            else:
+                matches.append(read(addr) == value)
+        return np.array(matches, dtype=bool)
+
+@lru_cache(maxsize=THERMAL_CACHE_SIZE)
+def thermal_loss_at(temperature_K):
+    """Thermal loss factor for one temperature (memoized for thermal sweeps)."""
+    T_ref = 300
+    loss = math.exp(-(temperature_K - T_ref) / 100)
+    return max(loss, 0.1)
+
+def thermal_loss_array(temperatures_K):
+    """Vectorized thermal_loss_at over an array of temperatures."""
+    import numpy as np
+    T_ref = 300
+    temperatures_K = np.asarray(temperatures_K, dtype=np.float64)
+    return np.maximum(np.exp(-(temperatures_K - T_ref) / 100), 0.1)
+
 # === Comprehensive Photonic Chip Class ===
 class PhotonicChip:
     """
@@ -189,9 +436,9 @@ class PhotonicChip:
         efficiency=0.85,
         temperature_K=TEMPERATURE_DEFAULT,
         photon_scaling=PHOTON_SCALING_DEFAULT,
+        register_trace_capacity=TRACE_CAPACITY_DEFAULT,
     ):
         self.wavelength = wavelength_nm * 1e-9  # nm to meters
-        self.frequency = self.SPEED_OF_LIGHT / self.wavelength
         self.efficiency = efficiency
         self.temperature = temperature_K
         self.photon_scaling = photon_scaling
@@ -201,28 +448,71 @@ class PhotonicChip:
         self.gas_input = 0
         self.error_flags = 0b00000000
         self.interrupt_enabled = False
+        self.registers = RegisterFile(self, register_trace_capacity)
+        self.metrics = None  # instrumentation.Metrics when recording
 
         # Quantum dot multi-frequency support
         self.wavelengths = [850e-9, 700e-9]
-        self.frequencies = [self.SPEED_OF_LIGHT / wl for wl in self.wavelengths]
-        self.energies = [self.PLANCK_CONSTANT * f for f in self.frequencies]
+
+    # --- Derived coefficients (recomputed only when their inputs change) ---
+    @property
+    def wavelength(self):
+        return self._wavelength
+
+    @wavelength.setter
+    def wavelength(self, value):
+        self._wavelength = value
+        self._frequency = self.SPEED_OF_LIGHT / value
+        self._photon_energy = self.PLANCK_CONSTANT * self._frequency
+
+    @property
+    def frequency(self):
+        return self._frequency
+
+    @property
+    def wavelengths(self):
+        return self._wavelengths
+
+    @wavelengths.setter
+    def wavelengths(self, values):
+        # Stored as a tuple so in-place edits cannot bypass the recompute
+        self._wavelengths = tuple(values)
+        self._frequencies = tuple(self.SPEED_OF_LIGHT / wl for wl in self._wavelengths)
+        self._energies = tuple(self.PLANCK_CONSTANT * f for f in self._frequencies)
+
+    @property
+    def frequencies(self):
+        return self._frequencies
+
+    @property
+    def energies(self):
+        return self._energies
+
+    @property
+    def temperature(self):
+        return self._temperature
+
+    @temperature.setter
+    def temperature(self, value):
+        self._temperature = value
+        self._thermal_loss = None
+        self._env_noise = None
 
     def photon_energy(self, use_multi=False):
         """Energy per photon in Joules, E = h*f"""
         if not use_multi:
-            return self.PLANCK_CONSTANT * self.frequency
+            return self._photon_energy
         else:
-            return [self.PLANCK_CONSTANT * freq for freq in self.frequencies]
+            return list(self._energies)
 
     def thermal_loss_factor(self):
         """
         Temperature-based loss; loss never less than 10% of baseline.
         Boltzmann integration for advanced modeling.
         """
-        k = self.BOLTZMANN_CONSTANT
-        T_ref = 300
-        loss = math.exp(-(self.temperature - T_ref) / 100)
-        return max(loss, 0.1)
+        if self._thermal_loss is None:
+            self._thermal_loss = thermal_loss_at(self._temperature)
+        return self._thermal_loss
 
     def adjusted_photon_yield(self, gas_units):
         """
@@ -230,8 +520,9 @@ class PhotonicChip:
         Used for benchmarking and calibration.
         """
         temp_coeff = self.thermal_loss_factor()
-        env_noise = 1 + 0.02 * (self.temperature - 300)
-        return (gas_units * self.efficiency * temp_coeff) / env_noise
+        if self._env_noise is None:
+            self._env_noise = 1 + 0.02 * (self._temperature - 300)
+        return (gas_units * self.efficiency * temp_coeff) / self._env_noise
 
     def photons_emitted(self, gas_units, use_multi=False):
         """
@@ -245,48 +536,72 @@ class PhotonicChip:
             return int(photons)
         else:
             # For each wavelength band, sum photons emitted
-            result = []
-            for e in self.energies:
-                base_emission = gas_units * self.efficiency * self.thermal_loss_factor()
-                photons = base_emission / e
-                result.append(int(photons))
-            return result
+            base_emission = gas_units * self.efficiency * self.thermal_loss_factor()
+            return [int(base_emission / e) for e in self.energies]
+
+    def photons_emitted_array(self, gas_units, use_multi=True, dtype="float64"):
+        """
+        Vectorized photons_emitted over an array of gas values.
+        Returns (N_gas x N_bands) for use_multi, else (N_gas,), holding the
+        same truncated counts as int() in the scalar path. Counts routinely
+        exceed 2**63, so the default dtype is float64 (still exact: int() of
+        a float is the float's truncated value); pass dtype=np.int64 when
+        the counts are known to fit.
+        """
+        import numpy as np
+        gas = np.asarray(gas_units, dtype=np.float64).reshape(-1)
+        if not np.isfinite(gas).all():
+            raise ValueError("gas_units must be finite")
+        base_emission = gas * self.efficiency * self.thermal_loss_factor()
+        if use_multi:
+            photons = base_emission[:, np.newaxis] / np.asarray(self.energies, dtype=np.float64)
+        else:
+            photons = base_emission / self.photon_energy()
+        photons = np.trunc(photons)
+        if np.issubdtype(dtype, np.integer):
+            info = np.iinfo(dtype)
+            if photons.size and (photons.max() > info.max or photons.min() < info.min):
+                raise OverflowError(f"photon counts exceed {np.dtype(dtype).name}; use dtype=np.float64")
+        return photons.astype(dtype)
 
     def simulate_operation(self, gas_units):
         """
         Comprehensive simulation output.
         Prints and returns total photons and energy (J).
         """
+        metrics = self.metrics
+        if metrics is not None:
+            t0 = time.perf_counter()
         photons = self.photons_emitted(gas_units)
         energy_used = photons * self.photon_energy()
+        if metrics is not None:
+            t1 = time.perf_counter()
         print(f"[{self.__class__.__name__}] Gas used: {gas_units}")
         print(f"Photons emitted: {photons}")
         print(f"Energy used (J): {energy_used:.3e}")
+        if metrics is not None:
+            metrics.record_operation(self, photons, t1 - t0, time.perf_counter() - t1)
         return photons, energy_used
 
+    def simulate_operation_array(self, gas_units):
+        """
+        Silent vectorized simulate_operation over an array of gas values.
+        Returns (photons, energy_J) float64 arrays; photons hold the same
+        truncated counts as the scalar path.
+        """
+        photons = self.photons_emitted_array(gas_units, use_multi=False)
+        return photons, photons * self.photon_energy()
+
     # --- SPI Register Emulation ---
+    def register_emission(self, gas_units):
+        """Emission triggered through the register file."""
+        return self.photons_emitted(gas_units)
+
     def update_registers(self, addr, value):
-        if addr == 0x00:
-            self.mode = value
-        elif addr == 0x01:
-            self.gas_input = (self.gas_input & 0xFF00) | value
-        elif addr == 0x02:
-            self.gas_input = (self.gas_input & 0x00FF) | (value << 8)
-        elif addr == 0x03:
-            self.photon_scaling = value
-        elif addr == 0x06:
-            self.interrupt_enabled = bool(value)
+        self.registers.write(addr, value)
 
     def read_register(self, addr):
-        if addr == 0x00:
-            return self.mode
-        elif addr == 0x04:
-            return 1  # Assume emission complete for demo
-        elif addr == 0x05:
-            return self.error_flags
-        elif addr == 0x06:
-            return int(self.interrupt_enabled)
-        return 0
+        return self.registers.read(addr)
 
 # === CLI and Manual Mode ===
 def manual_mode(chip):
@@ -308,74 +623,26 @@ def main():
     chip = PhotonicChip()
     manual_mode(chip)
 
-if __name__ == "__main__":
-    main()
-Photonchip Simulation Suite
-Version 1.0
+# === Waveguide section (lazy) ===
+# The waveguide model lives in waveguide_simulation.py and is only imported
+# when one of its names is first used, so chip-only users skip SciPy and
+# matplotlib entirely.
+_WAVEGUIDE_EXPORTS = {
+    "wavelength", "frequency", "omega", "c", "mu_0", "epsilon_0", "MODE_PROFILE_CACHE_SIZE",
+    "Material", "Waveguide", "mode_profiles_batch", "waveguide_mode_profiles",
+    "slab_effective_index", "solve_effective_index", "NeffTable",
+    "save_mode_profile", "render_mode_profiles", "simulate_waveguide",
+}
 
-This Python module simulates photonic waveguide behavior on silicon chips,
-mimicking electromagnetic wave propagation and material interactions.
-"""
+def __getattr__(name):
+    if name in _WAVEGUIDE_EXPORTS:
+        import waveguide_simulation
+        return getattr(waveguide_simulation, name)
+    if name == "TRACE_DTYPE":
+        return _trace_dtype()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy.constants import c, mu_0, epsilon_0
-
-# Constants
-wavelength = 1.55e-6  # meters
-frequency = c / wavelength
-omega = 2 * np.pi * frequency
-
-# Define materials
-class Material:
-    def __init__(self, name, n, alpha):
-        self.name = name
-        self.n = n  # Refractive index
-        self.alpha = alpha  # Absorption coefficient (1/m)
-
-# Define waveguide
-class Waveguide:
-    def __init__(self, core, cladding, width, height, length):
-        self.core = core
-        self.cladding = cladding
-        self.width = width
-        self.height = height
-        self.length = length
-
-    def effective_index(self):
-        return (self.core.n + self.cladding.n) / 2
-
-    def propagation_loss(self):
-        return self.core.alpha * self.length
-
-    def mode_profile(self, grid_size=100):
-        x = np.linspace(-self.width, self.width, grid_size)
-        y = np.linspace(-self.height, self.height, grid_size)
-        X, Y = np.meshgrid(x, y)
-        field = np.exp(-(X**2 + Y**2) / (self.width * self.height / 4))
-        return X, Y, field
-
-# Define simulation function
-def simulate_waveguide(wg: Waveguide):
-    neff = wg.effective_index()
-    loss = wg.propagation_loss()
-    print(f"Simulating waveguide with:")
-    print(f" - Effective Index (neff): {neff:.4f}")
-    print(f" - Propagation Loss: {loss:.4f} dB")
-
-    X, Y, field = wg.mode_profile()
-    plt.contourf(X * 1e6, Y * 1e6, field, levels=50, cmap="inferno")
-    plt.title("Mode Profile")
-    plt.xlabel("x (µm)")
-    plt.ylabel("y (µm)")
-    plt.colorbar(label="Field Intensity")
-    plt.axis("equal")
-    plt.show()
-
-# Example usage
 if __name__ == "__main__":
-    silicon = Material("Silicon", n=3.48, alpha=0.5)
-    sio2 = Material("SiO2", n=1.44, alpha=0.1)
-
-    wg = Waveguide(core=silicon, cladding=sio2, width=0.5e-6, height=0.22e-6, length=2e-3)
-    simulate_waveguide(wg)
+    main()
+    import waveguide_simulation
+    waveguide_simulation.main()
@@ -0,0 +1,322 @@
+"""
+Fleet simulator: many chips stepped together, sharded across processes.
+
+Every chip of the fleet is one row in a set of NumPy columns (temperature,
+efficiency, scaling, wavelength, gain, PV/TPV efficiency and one dopant
+voltage per layer), so a tick is a handful of vectorized operations
+instead of a loop over PhotonicChip / QuantumPhotonDevice objects. Each
+tick combines both models per chip: PhotonicChip.photons_emitted (single
+band) for the chip's ``gas`` input scaled by photon_scaling /
+PHOTON_SCALING_DEFAULT (the register's photons-per-gas-unit factor, so
+chips at the default scaling match photons_emitted exactly), and one
+QuantumPhotonDevice cycle for its ``applied_voltage`` row, with the chip's
+own dopant voltages as the layer base voltages.
+
+All columns live in one multiprocessing.shared_memory block. Workers of a
+ProcessPoolExecutor attach to it once (pool initializer) and step
+fixed-size shards of rows in place, so no array is copied per tick; they
+return only per-shard sums, which are combined in shard order, making the
+totals independent of the worker count.
+
+Usage:
+    with Fleet(200_000, n_workers=4) as fleet:
+        fleet["temperature_K"][:] = rng.normal(300, 5, fleet.n_chips)
+        for _ in range(100):
+            fleet["gas"][:] = rng.uniform(0, 30_000, fleet.n_chips)
+            tick = fleet.step()
+        fleet.totals()
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from energy_photon_chip_design import (
+    PHOTON_SCALING_DEFAULT,
+    PHOTON_WAVELENGTH_M,
+    PLANCK_CONSTANT,
+    SPEED_OF_LIGHT,
+    TEMPERATURE_DEFAULT,
+    PhotonicChip,
+    thermal_loss_array,
+)
+from rose_quartz import (
+    C,
+    DEFAULT_TOLERANCE,
+    DOPANT_LAYERS,
+    E_CHARGE,
+    PLANCK,
+    PV_TPV_CUTOFF_NM,
+    RECYCLE_FRACTION,
+    VOLTAGE_EFFECT,
+)
+
+DEFAULT_SHARD_SIZE = 1 << 16
+
+# Per-chip parameters and their defaults; "per_layer" columns are (N_chips x N_layers)
+PARAMETER_DEFAULTS = {
+    "wavelength_m": PHOTON_WAVELENGTH_M,
+    "efficiency": 0.85,
+    "temperature_K": float(TEMPERATURE_DEFAULT),
+    "photon_scaling": float(PHOTON_SCALING_DEFAULT),
+    "gain_factor": 2.0,
+    "pv_eff": 0.27,
+    "tpv_eff": 0.16,
+}
+PER_LAYER_COLUMNS = ("dopant_voltage", "applied_voltage")
+INPUT_COLUMNS = ("gas", "applied_voltage")
+OUTPUT_COLUMNS = ("photons", "energy_J", "pv_energy", "tpv_energy", "elec_output", "active_layers", "recycled")
+TOTAL_COLUMNS = ("photons_total", "energy_J_total", "energy_collected", "recycled_total")
+
+# Shard sums returned by workers, in this order
+_SUMS = ("photons", "energy_J", "pv_energy", "tpv_energy", "elec_output", "active_layers", "recycled")
+
+# Per-process state installed by _init_worker
+_worker_state = {}
+
+
+class FleetTick(NamedTuple):
+    """Fleet-wide sums for one tick."""
+    photons: float
+    energy_J: float
+    pv_energy: float
+    tpv_energy: float
+    elec_output: float
+    active_layers: int
+    recycled: int
+
+
+class FleetTotals(NamedTuple):
+    ticks: int
+    photons: float
+    energy_J: float
+    energy_collected: float
+    recycled: int
+
+
+def _layout(n_chips: int, n_layers: int) -> List[Tuple[str, str, tuple, int]]:
+    """(name, dtype, shape, byte offset) of every column in the shared block, 64-byte aligned."""
+    columns = [(name, "<f8") for name in PARAMETER_DEFAULTS]
+    columns += [("dopant_voltage", "<f8"), ("gas", "<f8"), ("applied_voltage", "<f8")]
+    columns += [(name, "<i8" if name in ("active_layers", "recycled") else "<f8") for name in OUTPUT_COLUMNS]
+    columns += [(name, "<i8" if name == "recycled_total" else "<f8") for name in TOTAL_COLUMNS]
+    layout = []
+    offset = 0
+    for name, dtype in columns:
+        shape = (n_chips, n_layers) if name in PER_LAYER_COLUMNS else (n_chips,)
+        layout.append((name, dtype, shape, offset))
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset += (nbytes + 63) // 64 * 64
+    return layout
+
+
+def _views(buffer, layout) -> Dict[str, np.ndarray]:
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        for name, dtype, shape, offset in layout
+    }
+
+
+def _layer_template(dopants: Sequence[dict], voltage_tolerance: float, voltage_effect: float):
+    n = len(dopants)
+    return (
+        np.array([d["base_wavelength"] for d in dopants], dtype=np.float64),
+        np.full(n, voltage_tolerance, dtype=np.float64),
+        np.full(n, voltage_effect, dtype=np.float64),
+    )
+
+
+def _step_rows(cols: Dict[str, np.ndarray], template, lo: int, hi: int) -> tuple:
+    """Advance rows [lo, hi) by one tick in place and return their sums (see _SUMS)."""
+    base_wavelength, tolerance, effect = template
+    rows = slice(lo, hi)
+
+    # PhotonicChip.photons_emitted, single band, of the scaled gas input
+    # (np.exp may differ from math.exp by an ulp)
+    photon_energy = PLANCK_CONSTANT * (SPEED_OF_LIGHT / cols["wavelength_m"][rows])
+    gas = cols["gas"][rows] * (cols["photon_scaling"][rows] / PHOTON_SCALING_DEFAULT)
+    base_emission = gas * cols["efficiency"][rows] * thermal_loss_array(cols["temperature_K"][rows])
+    photons = np.trunc(base_emission / photon_energy)
+    energy_J = photons * photon_energy
+
+    # QuantumPhotonDevice cycle (excitation, gain, PV/TPV, recycling)
+    mismatch = cols["applied_voltage"][rows] - cols["dopant_voltage"][rows]
+    active = np.abs(mismatch) < tolerance
+    shifted_wavelength = base_wavelength * (1 - effect * mismatch)
+    amplified = (PLANCK * C / shifted_wavelength / E_CHARGE) * cols["gain_factor"][rows, np.newaxis]
+    to_pv = active & (shifted_wavelength * 1e9 < PV_TPV_CUTOFF_NM)
+    to_tpv = active & ~to_pv
+    pv = np.zeros(hi - lo)
+    tpv = np.zeros(hi - lo)
+    for j in range(amplified.shape[1]):
+        pv += np.where(to_pv[:, j], amplified[:, j], 0.0)
+        tpv += np.where(to_tpv[:, j], amplified[:, j], 0.0)
+    elec = pv * cols["pv_eff"][rows] + tpv * cols["tpv_eff"][rows]
+    n_active = active.sum(axis=1)
+    recycled = (n_active * RECYCLE_FRACTION).astype(np.int64)
+
+    cols["photons"][rows] = photons
+    cols["energy_J"][rows] = energy_J
+    cols["pv_energy"][rows] = pv
+    cols["tpv_energy"][rows] = tpv
+    cols["elec_output"][rows] = elec
+    cols["active_layers"][rows] = n_active
+    cols["recycled"][rows] = recycled
+    cols["photons_total"][rows] += photons
+    cols["energy_J_total"][rows] += energy_J
+    cols["energy_collected"][rows] += elec
+    cols["recycled_total"][rows] += recycled
+    return (
+        float(photons.sum()), float(energy_J.sum()), float(pv.sum()), float(tpv.sum()),
+        float(elec.sum()), int(n_active.sum()), int(recycled.sum()),
+    )
+
+
+def _init_worker(shm_name: str, layout, template):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state["shm"] = shm
+    _worker_state["cols"] = _views(shm.buf, layout)
+    _worker_state["template"] = template
+
+
+def _step_shard(bounds: Tuple[int, int]) -> tuple:
+    return _step_rows(_worker_state["cols"], _worker_state["template"], *bounds)
+
+
+class Fleet:
+    """
+    Column-wise state of ``n_chips`` chips sharing one dopant-layer
+    template. Columns are NumPy views of shared memory: read or assign
+    them via ``fleet[name]`` (see PARAMETER_DEFAULTS, INPUT_COLUMNS,
+    OUTPUT_COLUMNS, TOTAL_COLUMNS and ``dopant_voltage``) between ticks.
+
+    ``n_workers`` defaults to the CPU count; 1 steps in-process. Call
+    close() (or use the fleet as a context manager) to stop the workers and
+    free the shared block.
+    """
+    def __init__(
+        self,
+        n_chips: int,
+        dopants: Sequence[dict] = DOPANT_LAYERS,
+        voltage_tolerance: float = DEFAULT_TOLERANCE,
+        voltage_effect: float = VOLTAGE_EFFECT,
+        n_workers: Optional[int] = None,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        **parameters: float,
+    ):
+        unknown = set(parameters) - set(PARAMETER_DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown fleet parameters: {sorted(unknown)}")
+        self.n_chips = n_chips
+        self.dopants = list(dopants)
+        self.n_layers = len(self.dopants)
+        self.shard_size = shard_size
+        self.ticks = 0
+        self._template = _layer_template(self.dopants, voltage_tolerance, voltage_effect)
+        self._layout = _layout(n_chips, self.n_layers)
+        _, dtype, shape, offset = self._layout[-1]
+        size = offset + int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self._cols = _views(self._shm.buf, self._layout)
+
+        for name, default in PARAMETER_DEFAULTS.items():
+            self._cols[name][:] = parameters.get(name, default)
+        nominal = np.array([d["voltage"] for d in self.dopants], dtype=np.float64)
+        self._cols["dopant_voltage"][:] = nominal
+        self._cols["applied_voltage"][:] = nominal
+        for name in ("gas",) + OUTPUT_COLUMNS + TOTAL_COLUMNS:
+            self._cols[name][:] = 0
+
+        self._shards = [(lo, min(lo + shard_size, n_chips)) for lo in range(0, n_chips, shard_size)]
+        workers = min(n_workers or os.cpu_count() or 1, max(1, len(self._shards)))
+        self._pool = None
+        if workers > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(self._shm.name, self._layout, self._template),
+            )
+
+    @classmethod
+    def from_chips(cls, chips: Sequence[PhotonicChip], dopants: Sequence[dict] = DOPANT_LAYERS, **kwargs) -> "Fleet":
+        """Fleet seeded with the wavelength, efficiency, temperature and scaling of existing chips."""
+        fleet = cls(len(chips), dopants, **kwargs)
+        fleet["wavelength_m"][:] = [chip.wavelength for chip in chips]
+        fleet["efficiency"][:] = [chip.efficiency for chip in chips]
+        fleet["temperature_K"][:] = [chip.temperature for chip in chips]
+        fleet["photon_scaling"][:] = [chip.photon_scaling for chip in chips]
+        return fleet
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._cols[name]
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return tuple(self._cols)
+
+    def step(self, gas=None, applied_voltages=None) -> FleetTick:
+        """
+        Advance every chip by one tick. ``gas`` (scalar or per chip) and
+        ``applied_voltages`` (per layer, or per chip and layer) overwrite the
+        input columns first; omitted inputs keep their current values.
+        """
+        if gas is not None:
+            self._cols["gas"][:] = gas
+        if applied_voltages is not None:
+            self._cols["applied_voltage"][:] = applied_voltages
+        if self._pool is None:
+            partials = [_step_rows(self._cols, self._template, lo, hi) for lo, hi in self._shards]
+        else:
+            partials = list(self._pool.map(_step_shard, self._shards))
+        self.ticks += 1
+        sums = [0.0] * len(_SUMS)
+        for partial in partials:
+            for k, value in enumerate(partial):
+                sums[k] += value
+        return FleetTick(*sums[:5], int(sums[5]), int(sums[6]))
+
+    def run(self, ticks: int, gas=None, applied_voltages=None) -> List[FleetTick]:
+        """Run ``ticks`` ticks with fixed inputs; returns the per-tick sums."""
+        results = []
+        for tick in range(ticks):
+            results.append(self.step(gas, applied_voltages) if tick == 0 else self.step())
+        return results
+
+    def totals(self) -> FleetTotals:
+        cols = self._cols
+        return FleetTotals(
+            self.ticks,
+            float(cols["photons_total"].sum()),
+            float(cols["energy_J_total"].sum()),
+            float(cols["energy_collected"].sum()),
+            int(cols["recycled_total"].sum()),
+        )
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._shm is None:
+            return
+        self._cols = {}
+        self._shm.unlink()
+        try:
+            self._shm.close()
+        except BufferError:
+            # Caller still holds column views; the mapping goes when they do
+            pass
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
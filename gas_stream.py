@@ -0,0 +1,245 @@
+"""
+Streaming gas-trace ingestion for PhotonicChip.
+
+Bulk counterpart of the interactive manual_mode: gas traces are read from
+CSV, NDJSON or raw binary files (or stdin) in fixed-size chunks, pushed
+through the vectorized PhotonicChip model and reduced to photons and
+energy (J) per window of consecutive rows. Every stage is a generator over
+NumPy chunks and windows carry only running sums between chunks, so memory
+use depends on the chunk size, never on the trace length.
+
+Usage:
+    python gas_stream.py trace.csv -o windows.csv --window 1000
+    cat trace.ndjson | python gas_stream.py - --format ndjson --key gas
+    python gas_stream.py history.phtrace --column gas --window 100
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import sys
+from typing import Iterable, Iterator, NamedTuple, Optional, TextIO, Union
+
+import numpy as np
+
+from energy_photon_chip_design import PhotonicChip
+from photon_trace import TRACE_SUFFIX, iter_column
+
+DEFAULT_CHUNK_SIZE = 1 << 16   # Rows per chunk
+TRACE_FORMATS = ("csv", "ndjson", "bin", "phtrace")
+
+
+# --- Readers ---
+def _open_input(path: str, binary: bool):
+    if path == "-":
+        return sys.stdin.buffer if binary else sys.stdin
+    return open(path, "rb") if binary else open(path, "r", newline="")
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext in (".bin", ".f8", ".raw"):
+        return "bin"
+    if ext == TRACE_SUFFIX:
+        return "phtrace"
+    return "csv"
+
+
+def read_csv_chunks(
+    stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE, column: Union[int, str] = 0, delimiter: str = ","
+) -> Iterator[np.ndarray]:
+    """
+    Yield float64 gas chunks from a CSV stream. A non-numeric first line is
+    taken as a header, and ``column`` may then name a column.
+    """
+    lines = iter(stream)
+    first = next(lines, None)
+    if first is None:
+        return
+    fields = [f.strip() for f in first.split(delimiter)]
+    try:
+        float(fields[column] if isinstance(column, int) else "")
+        lines = itertools.chain([first], lines)
+    except ValueError:
+        if not isinstance(column, int):
+            column = fields.index(column)
+    while True:
+        block = list(itertools.islice(lines, chunk_size))
+        if not block:
+            return
+        yield np.loadtxt(io.StringIO("".join(block)), delimiter=delimiter, usecols=column, ndmin=1, dtype=np.float64)
+
+
+def read_ndjson_chunks(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE, key: str = "gas") -> Iterator[np.ndarray]:
+    """Yield gas chunks from NDJSON lines holding either an object with ``key`` or a bare number."""
+    buffer = np.empty(chunk_size, dtype=np.float64)
+    n = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        buffer[n] = record[key] if isinstance(record, dict) else record
+        n += 1
+        if n == chunk_size:
+            yield buffer.copy()
+            n = 0
+    if n:
+        yield buffer[:n].copy()
+
+
+def read_binary_chunks(stream, chunk_size: int = DEFAULT_CHUNK_SIZE, dtype: str = "<f8") -> Iterator[np.ndarray]:
+    """Yield gas chunks from a headerless stream of fixed-width little-endian values."""
+    itemsize = np.dtype(dtype).itemsize
+    while True:
+        raw = stream.read(chunk_size * itemsize)
+        if not raw:
+            return
+        usable = len(raw) - len(raw) % itemsize
+        yield np.frombuffer(raw[:usable], dtype=dtype).astype(np.float64)
+
+
+def read_gas_chunks(
+    path: str,
+    fmt: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    column: Union[int, str] = 0,
+    key: str = "gas",
+    dtype: str = "<f8",
+) -> Iterator[np.ndarray]:
+    """Open ``path`` ('-' for stdin) and yield its gas values chunk by chunk."""
+    fmt = fmt or detect_format(path)
+    if fmt not in TRACE_FORMATS:
+        raise ValueError(f"unknown trace format {fmt!r}; expected one of {TRACE_FORMATS}")
+    if fmt == "phtrace":
+        yield from iter_column(path, column if isinstance(column, str) else key, chunk_size)
+        return
+    stream = _open_input(path, binary=(fmt == "bin"))
+    try:
+        if fmt == "csv":
+            yield from read_csv_chunks(stream, chunk_size, column)
+        elif fmt == "ndjson":
+            yield from read_ndjson_chunks(stream, chunk_size, key)
+        else:
+            yield from read_binary_chunks(stream, chunk_size, dtype)
+    finally:
+        if path != "-":
+            stream.close()
+
+
+# --- Pipeline stages ---
+class SimulatedChunk(NamedTuple):
+    gas: np.ndarray
+    photons: np.ndarray
+    energy_J: np.ndarray
+
+
+def simulate_chunks(chip: PhotonicChip, chunks: Iterable[np.ndarray]) -> Iterator[SimulatedChunk]:
+    """Run simulate_operation math over each gas chunk."""
+    for gas in chunks:
+        photons, energy = chip.simulate_operation_array(gas)
+        yield SimulatedChunk(gas, photons, energy)
+
+
+def aggregate_windows(chunks: Iterable[SimulatedChunk], window: int = 1) -> Iterator[np.ndarray]:
+    """
+    Sum gas, photons and energy over consecutive windows of ``window`` rows.
+    Yields one (K x 3) array of completed windows per input chunk; a final
+    partial window is flushed at the end.
+    """
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    carry_rows = 0
+    carry = np.zeros(3)
+    for chunk in chunks:
+        cols = np.column_stack((chunk.gas, chunk.photons, chunk.energy_J))
+        done = []
+        need = window - carry_rows
+        if len(cols) < need:
+            carry += cols.sum(axis=0)
+            carry_rows += len(cols)
+            continue
+        done.append(carry + cols[:need].sum(axis=0))
+        rest = cols[need:]
+        full = len(rest) // window
+        if full:
+            done.extend(rest[:full * window].reshape(full, window, 3).sum(axis=1))
+        tail = rest[full * window:]
+        carry = tail.sum(axis=0)
+        carry_rows = len(tail)
+        yield np.array(done)
+    if carry_rows:
+        yield carry[np.newaxis, :]
+
+
+def _count_rows(chunks: Iterable[np.ndarray], counter: list) -> Iterator[np.ndarray]:
+    for chunk in chunks:
+        counter[0] += len(chunk)
+        yield chunk
+
+
+# --- Writer ---
+def write_windows(window_blocks: Iterable[np.ndarray], out: TextIO, window: int, row_counter: list) -> int:
+    """Write aggregated windows as CSV; returns the number of windows written."""
+    out.write("window,first_row,rows,gas,photons,energy_J\n")
+    index = 0
+    for block in window_blocks:
+        if not len(block):
+            continue
+        ids = np.arange(index, index + len(block))
+        first = ids * window
+        # The trailing partial window is shorter than ``window``
+        rows = np.minimum(window, row_counter[0] - first)
+        table = np.column_stack((ids, first, rows, block))
+        np.savetxt(out, table, delimiter=",", fmt=("%d", "%d", "%d", "%.17g", "%.17g", "%.17g"))
+        index += len(block)
+    return index
+
+
+def stream_trace(
+    chip: PhotonicChip,
+    path: str,
+    out: TextIO,
+    fmt: Optional[str] = None,
+    window: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    column: Union[int, str] = 0,
+    key: str = "gas",
+    dtype: str = "<f8",
+) -> int:
+    """Read a gas trace, simulate it and write per-window totals to ``out``."""
+    counter = [0]
+    chunks = _count_rows(read_gas_chunks(path, fmt, chunk_size, column, key, dtype), counter)
+    return write_windows(aggregate_windows(simulate_chunks(chip, chunks), window), out, window, counter)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a gas trace through the PhotonicChip model.")
+    parser.add_argument("input", help="trace file, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output CSV (default: stdout)")
+    parser.add_argument("--format", choices=TRACE_FORMATS, help="input format (default: from extension)")
+    parser.add_argument("--window", type=int, default=1, help="rows aggregated per output line")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--column", default="0", help="CSV column index or header name; trace column name")
+    parser.add_argument("--key", default="gas", help="NDJSON field holding the gas value")
+    parser.add_argument("--dtype", default="<f8", help="binary value type (NumPy dtype string)")
+    parser.add_argument("--wavelength-nm", type=float, default=850)
+    parser.add_argument("--efficiency", type=float, default=0.85)
+    parser.add_argument("--temperature", type=float, default=300)
+    args = parser.parse_args(argv)
+
+    column = int(args.column) if args.column.isdigit() else args.column
+    chip = PhotonicChip(wavelength_nm=args.wavelength_nm, efficiency=args.efficiency, temperature_K=args.temperature)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        stream_trace(chip, args.input, out, args.format, args.window, args.chunk_size, column, args.key, args.dtype)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Opt-in instrumentation for the device pipeline and PhotonicChip.
+
+QuantumPhotonDevice and PhotonicChip carry a ``metrics`` attribute that is
+None by default; the hot paths check it once per call and skip every
+timestamp and counter when it is unset. Attach a Metrics registry to turn
+recording on:
+
+    metrics = Metrics()
+    metrics.instrument(device, chip)
+    device.run_cycle(voltages)
+    print(metrics.render())                 # Prometheus text exposition
+    metrics.write_textfile("sim.prom")      # e.g. for a node_exporter textfile collector
+    serve_metrics(metrics, port=9108)       # GET /metrics
+    with MetricsReporter(metrics, interval=10, path="sim.prom", jsonl_path="sim.jsonl"):
+        run_long_simulation()
+
+Recorded metrics:
+    photon_device_cycles_total, photon_device_recycled_photons_total,
+    photon_device_activations_total{dopant}, photon_device_voltage_mismatches_total{dopant},
+    photon_device_energy_collected (gauge), photon_device_stage_seconds{stage}
+        (stages: excitation, gain, conversion, recycling, display),
+    photonic_chip_operations_total, photonic_chip_photons_total,
+    photonic_chip_stage_seconds{stage} (stages: emission, report)
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+DEVICE_STAGES = ("excitation", "gain", "conversion", "recycling")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name -> (type, help)
+METRIC_INFO = {
+    "photon_device_cycles_total": ("counter", "Device cycles executed."),
+    "photon_device_recycled_photons_total": ("counter", "Photons fed back by the recycling stage."),
+    "photon_device_activations_total": ("counter", "Layer activations, by dopant."),
+    "photon_device_voltage_mismatches_total": ("counter", "Layers left dark by a voltage outside tolerance, by dopant."),
+    "photon_device_energy_collected": ("gauge", "Cumulative electrical output of the device (device units)."),
+    "photon_device_stage_seconds": ("summary", "Time spent per run_cycle stage."),
+    "photonic_chip_operations_total": ("counter", "PhotonicChip.simulate_operation calls."),
+    "photonic_chip_photons_total": ("counter", "Photons emitted by simulate_operation."),
+    "photonic_chip_stage_seconds": ("summary", "Time spent per simulate_operation stage."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and (count, sum, max) summaries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._summaries: Dict[Tuple[str, Labels], list] = {}
+
+    # --- Attaching ---
+    def instrument(self, *targets):
+        """Start recording for each device or chip in ``targets``."""
+        for target in targets:
+            target.metrics = self
+        return self
+
+    @staticmethod
+    def detach(*targets):
+        for target in targets:
+            target.metrics = None
+
+    # --- Primitive updates ---
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._observe(key, seconds)
+
+    def _observe(self, key, seconds):
+        summary = self._summaries.get(key)
+        if summary is None:
+            self._summaries[key] = [1, seconds, seconds]
+        else:
+            summary[0] += 1
+            summary[1] += seconds
+            if seconds > summary[2]:
+                summary[2] = seconds
+
+    # --- Hot-path recorders (called only when instrumentation is attached) ---
+    def record_cycle(self, device, result, stage_seconds):
+        """One QuantumPhotonDevice cycle; ``stage_seconds`` parallels DEVICE_STAGES."""
+        layers = device.chip.layers[:len(result.input_voltages)]
+        counters = self._counters
+        with self._lock:
+            for stage, seconds in zip(DEVICE_STAGES, stage_seconds):
+                self._observe(("photon_device_stage_seconds", (("stage", stage),)), seconds)
+            key = ("photon_device_cycles_total", ())
+            counters[key] = counters.get(key, 0) + 1
+            key = ("photon_device_recycled_photons_total", ())
+            counters[key] = counters.get(key, 0) + result.recycled
+            for layer in layers:
+                name = ("photon_device_activations_total" if layer.active_voltage is not None
+                        else "photon_device_voltage_mismatches_total")
+                key = (name, (("dopant", layer.dopant["name"]),))
+                counters[key] = counters.get(key, 0) + 1
+            self._gauges[("photon_device_energy_collected", ())] = result.energy_collected
+
+    def record_display(self, seconds: float):
+        self.observe("photon_device_stage_seconds", seconds, stage="display")
+
+    def record_operation(self, chip, photons, emission_seconds: float, report_seconds: float):
+        """One PhotonicChip.simulate_operation call."""
+        counters = self._counters
+        with self._lock:
+            self._observe(("photonic_chip_stage_seconds", (("stage", "emission"),)), emission_seconds)
+            self._observe(("photonic_chip_stage_seconds", (("stage", "report"),)), report_seconds)
+            key = ("photonic_chip_operations_total", ())
+            counters[key] = counters.get(key, 0) + 1
+            key = ("photonic_chip_photons_total", ())
+            counters[key] = counters.get(key, 0) + photons
+
+    # --- Reading ---
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+    def snapshot(self) -> dict:
+        """Point-in-time copy as plain JSON-ready data."""
+        with self._lock:
+            counters = list(self._counters.items())
+            gauges = list(self._gauges.items())
+            summaries = [(key, tuple(value)) for key, value in self._summaries.items()]
+
+        def entry(key, **values):
+            name, labels = key
+            return {"name": name, "labels": dict(labels), **values}
+
+        return {
+            "time": time.time(),
+            "counters": [entry(key, value=value) for key, value in counters],
+            "gauges": [entry(key, value=value) for key, value in gauges],
+            "summaries": [entry(key, count=c, sum=s, max=m) for key, (c, s, m) in summaries],
+        }
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            series: Dict[str, list] = {}
+            for (name, labels), value in self._counters.items():
+                series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_number(value)}")
+            for (name, labels), value in self._gauges.items():
+                series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_number(value)}")
+            for (name, labels), (count, total, peak) in self._summaries.items():
+                lines = series.setdefault(name, [])
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_number(total)}")
+                # A summary may only carry _count/_sum, so the peak is its own gauge
+                series.setdefault(f"{name}_max", []).append(f"{name}_max{_format_labels(labels)} {_number(peak)}")
+        out = []
+        for name in sorted(series):
+            kind, help_text = _metric_info(name)
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(sorted(series[name]))
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path: str):
+        """Write the exposition atomically (rename over the old file)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+def _metric_info(name: str) -> Tuple[str, str]:
+    if name in METRIC_INFO:
+        return METRIC_INFO[name]
+    base = name[:-len("_max")]
+    if name.endswith("_max") and METRIC_INFO.get(base, ("",))[0] == "summary":
+        return "gauge", f"Longest single observation of {base}."
+    return "untyped", name
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- Exporters ---
+def serve_metrics(metrics: Metrics, host: str = "127.0.0.1", port: int = 9108) -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread; call ``shutdown()`` on the result to stop."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def push_metrics(metrics: Metrics, url: str, timeout: float = 5.0):
+    """PUT the exposition to a Pushgateway-style endpoint, e.g. http://host:9091/metrics/job/sim."""
+    request = urllib.request.Request(
+        url, data=metrics.render().encode("utf-8"), method="PUT",
+        headers={"Content-Type": PROMETHEUS_CONTENT_TYPE},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status
+
+
+class MetricsReporter:
+    """
+    Background thread that, every ``interval`` seconds, rewrites a
+    Prometheus textfile, appends a JSON snapshot line, pushes to ``push_url``
+    and/or calls ``callback(snapshot)``. A final report runs on stop().
+    """
+    def __init__(
+        self,
+        metrics: Metrics,
+        interval: float = 10.0,
+        path: Optional[str] = None,
+        jsonl_path: Optional[str] = None,
+        push_url: Optional[str] = None,
+        callback: Optional[Callable[[dict], None]] = None,
+    ):
+        self.metrics = metrics
+        self.interval = interval
+        self.path = path
+        self.jsonl_path = jsonl_path
+        self.push_url = push_url
+        self.callback = callback
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def report(self):
+        if self.path:
+            self.metrics.write_textfile(self.path)
+        if self.push_url:
+            push_metrics(self.metrics, self.push_url)
+        if self.jsonl_path or self.callback:
+            snapshot = self.metrics.snapshot()
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a") as f:
+                    f.write(json.dumps(snapshot) + "\n")
+            if self.callback:
+                self.callback(snapshot)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.report()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,318 @@
+"""
+Monte Carlo uncertainty engine for photon yield and device output.
+
+Operating conditions that the chip models treat as exact (temperature,
+quantum efficiency, environmental noise, optical gain, PV/TPV efficiency,
+applied voltages) are drawn from user-specified distributions with a NumPy
+Generator. Samples are evaluated with the vectorized model paths in chunks
+of ``chunk_size``, so intermediate arrays stay bounded regardless of the
+sample count. By default each chunk is folded into a StreamingSummary
+(running mean/variance plus an adaptive histogram for percentiles), so
+memory does not grow with ``n_samples``; pass ``keep_samples=True`` to
+retain every sample and get exact percentiles instead.
+
+Usage:
+    result = photon_yield_mc(
+        PhotonicChip(), gas_units=21000,
+        temperature=Distribution("normal", 300, 5),
+        efficiency=Distribution("uniform", 0.8, 0.9),
+        n_samples=1_000_000, seed=1,
+    )
+    result.summary["photons"]["percentiles"][95]
+"""
+
+import math
+from statistics import NormalDist
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from energy_photon_chip_design import PhotonicChip, thermal_loss_array
+from rose_quartz import EmissionBatch, QuantumPhotonDevice
+
+DEFAULT_CHUNK_SIZE = 1 << 18
+DEFAULT_PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+DEFAULT_HISTOGRAM_BINS = 1 << 14
+
+
+class Distribution:
+    """
+    A sampling recipe: the name of a numpy.random.Generator method and its
+    positional arguments, e.g. Distribution("normal", 300, 5) or
+    Distribution("triangular", 0.8, 0.85, 0.9).
+    """
+    def __init__(self, name: str, *args):
+        if not callable(getattr(np.random.Generator, name, None)):
+            raise ValueError(f"numpy Generator has no distribution {name!r}")
+        self.name = name
+        self.args = args
+
+    def sample(self, rng: np.random.Generator, size) -> np.ndarray:
+        return np.asarray(getattr(rng, self.name)(*self.args, size=size), dtype=np.float64)
+
+    def __repr__(self):
+        return f"Distribution({self.name!r}, {', '.join(map(repr, self.args))})"
+
+
+class Fixed(Distribution):
+    """Degenerate distribution that always returns ``value``."""
+    def __init__(self, value: float):
+        self.name = "fixed"
+        self.args = (value,)
+
+    def sample(self, rng, size) -> np.ndarray:
+        return np.full(size, self.args[0], dtype=np.float64)
+
+
+class MonteCarloResult(NamedTuple):
+    samples: Optional[Dict[str, np.ndarray]]   # None unless keep_samples=True
+    summary: Dict[str, dict]
+
+
+def summarize(values: np.ndarray, percentiles: Sequence[float] = DEFAULT_PERCENTILES, confidence: float = 0.95) -> dict:
+    """
+    Mean, standard deviation, the requested percentiles, a normal-theory
+    confidence interval for the mean and the central ``confidence`` interval
+    of the samples themselves.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    mean = float(values.mean())
+    std = float(values.std(ddof=1)) if n > 1 else 0.0
+    tail = (1 - confidence) / 2 * 100
+    pct = np.percentile(values, list(percentiles) + [tail, 100 - tail])
+    return _summary(n, mean, std, percentiles, pct, confidence)
+
+
+def _summary(n, mean, std, percentiles, pct, confidence) -> dict:
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    half = z * std / math.sqrt(n) if n else float("nan")
+    return {
+        "n": n,
+        "mean": mean,
+        "std": std,
+        "percentiles": {p: float(v) for p, v in zip(percentiles, pct[:-2])},
+        "mean_ci": (mean - half, mean + half),
+        "interval": (float(pct[-2]), float(pct[-1])),
+        "confidence": confidence,
+    }
+
+
+class StreamingSummary:
+    """
+    Constant-memory counterpart of ``summarize`` for data arriving in chunks.
+
+    Count, mean and variance are merged exactly per chunk (Chan et al.).
+    Percentiles come from a histogram of ``bins`` equal-width bins that
+    doubles its bin width (merging neighbour pairs) whenever a chunk falls
+    outside the covered range, so they are accurate to about one bin width,
+    (max - min) / (bins / 2) at worst, and are clamped to the observed
+    min/max. Non-finite samples still reach the mean/variance but are left
+    out of the histogram.
+    """
+    def __init__(self, bins: int = DEFAULT_HISTOGRAM_BINS):
+        if bins < 2 or bins % 2:
+            raise ValueError("bins must be an even number >= 2")
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.binned = 0
+        self.lo = 0.0
+        self.width = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        m = len(values)
+        if not m:
+            return
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(np.square(values - chunk_mean).sum())
+        total = self.n + m
+        delta = chunk_mean - self.mean
+        self.mean += delta * m / total
+        self.m2 += chunk_m2 + delta * delta * self.n * m / total
+        self.n = total
+
+        finite = np.isfinite(values)
+        if not finite.all():
+            values = values[finite]
+            if not len(values):
+                return
+        vmin = float(values.min())
+        vmax = float(values.max())
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+        self._cover(vmin, vmax)
+        bins = len(self.counts)
+        index = np.minimum(((values - self.lo) / self.width).astype(np.int64), bins - 1)
+        self.counts += np.bincount(index, minlength=bins)
+        self.binned += len(values)
+
+    def _cover(self, vmin, vmax):
+        bins = len(self.counts)
+        if not self.width:
+            self.lo = vmin
+            # A constant first chunk still needs a non-zero width; later chunks widen it
+            self.width = (vmax - vmin) / bins or max(abs(vmin), 1.0) * 2.0 ** -40
+            return
+        half = bins // 2
+        while vmin < self.lo or vmax >= self.lo + bins * self.width:
+            merged = self.counts.reshape(half, 2).sum(axis=1)
+            self.counts[:] = 0
+            if vmin < self.lo:
+                self.counts[half:] = merged
+                self.lo -= bins * self.width
+            else:
+                self.counts[:half] = merged
+            self.width *= 2
+
+    def quantiles(self, percentiles: Sequence[float]) -> np.ndarray:
+        """Histogram estimate of the given percentiles (0-100)."""
+        cumulative = np.cumsum(self.counts)
+        out = np.empty(len(percentiles))
+        if not self.binned:
+            out.fill(np.nan)
+            return out
+        for k, p in enumerate(percentiles):
+            target = p / 100 * self.binned
+            i = min(int(np.searchsorted(cumulative, target)), len(cumulative) - 1)
+            below = cumulative[i - 1] if i else 0
+            inside = (target - below) / self.counts[i] if self.counts[i] else 0.0
+            out[k] = min(max(self.lo + (i + inside) * self.width, self.min), self.max)
+        return out
+
+    def summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES, confidence: float = 0.95) -> dict:
+        """Same keys as ``summarize``."""
+        std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        tail = (1 - confidence) / 2 * 100
+        pct = self.quantiles(list(percentiles) + [tail, 100 - tail])
+        return _summary(self.n, self.mean, std, percentiles, pct, confidence)
+
+
+class _Collector:
+    """Per-metric sink: full sample arrays (keep_samples) or StreamingSummary."""
+    def __init__(self, names, n_samples, keep_samples, histogram_bins):
+        self.samples = {name: np.empty(n_samples) for name in names} if keep_samples else None
+        self.streams = None if keep_samples else {name: StreamingSummary(histogram_bins) for name in names}
+
+    def add(self, name, start, stop, values):
+        if self.samples is not None:
+            self.samples[name][start:stop] = values
+        else:
+            self.streams[name].update(values)
+
+    def result(self, percentiles, confidence) -> MonteCarloResult:
+        if self.samples is not None:
+            summary = {name: summarize(v, percentiles, confidence) for name, v in self.samples.items()}
+        else:
+            summary = {name: s.summary(percentiles, confidence) for name, s in self.streams.items()}
+        return MonteCarloResult(self.samples, summary)
+
+
+def _chunks(n_samples: int, chunk_size: int):
+    for start in range(0, n_samples, chunk_size):
+        yield start, min(start + chunk_size, n_samples)
+
+
+def photon_yield_mc(
+    chip: PhotonicChip,
+    gas_units: float,
+    temperature: Optional[Distribution] = None,
+    efficiency: Optional[Distribution] = None,
+    env_noise: Optional[Distribution] = None,
+    n_samples: int = 1_000_000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: Optional[int] = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    confidence: float = 0.95,
+    keep_samples: bool = False,
+    histogram_bins: int = DEFAULT_HISTOGRAM_BINS,
+) -> MonteCarloResult:
+    """
+    Uncertainty of PhotonicChip output for one gas amount.
+
+    Metrics: ``photons`` (photons_emitted, single band), ``energy_J``
+    (photons * photon energy) and ``adjusted_yield`` (adjusted_photon_yield).
+    Distributions left as None hold the chip's current value; ``env_noise``
+    defaults to the chip's deterministic 1 + 0.02 (T - 300). Percentiles are
+    histogram estimates unless ``keep_samples`` (see StreamingSummary).
+    """
+    rng = np.random.default_rng(seed)
+    temperature = temperature or Fixed(chip.temperature)
+    efficiency = efficiency or Fixed(chip.efficiency)
+    photon_energy = chip.photon_energy()
+    out = _Collector(("photons", "energy_J", "adjusted_yield"), n_samples, keep_samples, histogram_bins)
+
+    for start, stop in _chunks(n_samples, chunk_size):
+        n = stop - start
+        T = temperature.sample(rng, n)
+        eff = efficiency.sample(rng, n)
+        base = gas_units * eff * thermal_loss_array(T)
+        photons = np.trunc(base / photon_energy)
+        noise = env_noise.sample(rng, n) if env_noise is not None else 1 + 0.02 * (T - 300)
+        out.add("photons", start, stop, photons)
+        out.add("energy_J", start, stop, photons * photon_energy)
+        out.add("adjusted_yield", start, stop, base / noise)
+
+    return out.result(percentiles, confidence)
+
+
+def device_output_mc(
+    device: QuantumPhotonDevice,
+    nominal_voltages: Sequence[float],
+    voltage_jitter: Optional[Distribution] = None,
+    gain_factor: Optional[Distribution] = None,
+    pv_eff: Optional[Distribution] = None,
+    tpv_eff: Optional[Distribution] = None,
+    cycles: int = 1,
+    n_samples: int = 1_000_000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: Optional[int] = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    confidence: float = 0.95,
+    keep_samples: bool = False,
+    histogram_bins: int = DEFAULT_HISTOGRAM_BINS,
+) -> MonteCarloResult:
+    """
+    Uncertainty of QuantumPhotonDevice output.
+
+    Each sample is one device realisation: gain and PV/TPV efficiencies are
+    drawn once, then ``cycles`` cycles run with independent voltage jitter
+    (added to ``nominal_voltages`` per layer). Metrics: ``energy_collected``
+    (sum over the cycles), ``elec_output`` (per-cycle mean) and
+    ``activated_layers`` (per-cycle mean). The device itself is not modified.
+    Percentiles are histogram estimates unless ``keep_samples``.
+    """
+    rng = np.random.default_rng(seed)
+    nominal = np.asarray(nominal_voltages, dtype=np.float64)
+    layers = device.chip.layers
+    gain_factor = gain_factor or Fixed(device.gain_factor)
+    pv_eff = pv_eff or Fixed(device.pv_eff)
+    tpv_eff = tpv_eff or Fixed(device.tpv_eff)
+    jitter = voltage_jitter or Fixed(0.0)
+    out = _Collector(("energy_collected", "elec_output", "activated_layers"), n_samples, keep_samples, histogram_bins)
+
+    # Keep per-chunk (samples x layers) arrays near chunk_size elements
+    rows = max(1, chunk_size // max(1, len(layers)))
+    for start, stop in _chunks(n_samples, rows):
+        n = stop - start
+        gain = gain_factor.sample(rng, n)
+        pv = pv_eff.sample(rng, n)
+        tpv = tpv_eff.sample(rng, n)
+        collected = np.zeros(n)
+        activated = np.zeros(n)
+        for _ in range(cycles):
+            volts = nominal + jitter.sample(rng, (n, len(layers)))
+            batch = EmissionBatch(layers, volts, device.chip.excite_batch(volts, device.units), device.units)
+            batch.amplify(gain[:, np.newaxis])
+            pv_energy, tpv_energy = batch.split_pv_tpv()
+            collected += pv_energy * pv + tpv_energy * tpv
+            activated += batch.active.sum(axis=1)
+        out.add("energy_collected", start, stop, collected)
+        out.add("elec_output", start, stop, collected / cycles)
+        out.add("activated_layers", start, stop, activated / cycles)
+
+    return out.result(percentiles, confidence)
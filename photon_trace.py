@@ -0,0 +1,233 @@
+"""
+Memory-mapped binary trace format for gas histories and simulation output.
+
+Layout (all little-endian):
+    0   8s   magic b"PHOTRC01"
+    8   u2   format version
+    10  u2   number of columns
+    12  u4   header size in bytes (offset of the first record, 64-aligned)
+    16  u8   number of records
+    24  ...  zero padding up to byte 32
+    32  column table, 32 bytes per column: name (24s, NUL-padded), dtype (8s)
+    header_size  fixed-width records, one field per column
+
+Records are packed row by row, so appending is a plain write at the end
+followed by a record-count update, while ``open_trace`` exposes each column
+as a zero-copy (strided) view through ``np.memmap``.
+
+Usage:
+    with TraceWriter("gas.phtrace", [("gas", "<f8")]) as w:
+        w.append(gas=gas_values)
+    simulate_trace(PhotonicChip(), "gas.phtrace", "out.phtrace")
+    out = open_trace("out.phtrace")
+    out["energy_J"].sum()
+"""
+
+import csv
+import io
+import itertools
+import os
+import struct
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from energy_photon_chip_design import ENERGY_BUDGET, PhotonicChip
+
+TRACE_MAGIC = b"PHOTRC01"
+TRACE_VERSION = 1
+TRACE_SUFFIX = ".phtrace"
+DEFAULT_CHUNK_ROWS = 1 << 20
+
+_PREAMBLE = struct.Struct("<8sHHIQ")   # magic, version, n_columns, header_size, n_rows
+_PREAMBLE_SIZE = 32
+_COLUMN = struct.Struct("<24s8s")
+_NROWS_OFFSET = 16
+
+# Columns written by simulate_trace
+SIMULATION_COLUMNS = [("gas", "<f8"), ("photons", "<f8"), ("energy_J", "<f8")]
+
+
+class TraceFormatError(ValueError):
+    """Raised when a file is not a valid photon trace."""
+
+
+def _record_dtype(columns: Sequence[Tuple[str, str]]) -> np.dtype:
+    """Packed record dtype with every multi-byte column forced little-endian."""
+    fields = []
+    for name, dtype in columns:
+        dt = np.dtype(dtype)
+        fields.append((name, dt if dt.byteorder == "|" else dt.newbyteorder("<")))
+    return np.dtype(fields)
+
+
+def _header_size(n_columns: int) -> int:
+    raw = _PREAMBLE_SIZE + n_columns * _COLUMN.size
+    return (raw + 63) // 64 * 64
+
+
+def read_header(path: str) -> Tuple[List[Tuple[str, str]], int, int]:
+    """Return (columns, header_size, n_rows) for a trace file."""
+    with open(path, "rb") as f:
+        preamble = f.read(_PREAMBLE_SIZE)
+        if len(preamble) < _PREAMBLE_SIZE:
+            raise TraceFormatError(f"{path}: truncated header")
+        magic, version, n_columns, header_size, n_rows = _PREAMBLE.unpack_from(preamble)
+        if magic != TRACE_MAGIC:
+            raise TraceFormatError(f"{path}: not a photon trace (bad magic)")
+        if version != TRACE_VERSION:
+            raise TraceFormatError(f"{path}: unsupported trace version {version}")
+        columns = []
+        for _ in range(n_columns):
+            name, dtype = _COLUMN.unpack(f.read(_COLUMN.size))
+            columns.append((name.rstrip(b"\0").decode("ascii"), dtype.rstrip(b"\0").decode("ascii")))
+    return columns, header_size, n_rows
+
+
+def open_trace(path: str, mode: str = "r") -> np.memmap:
+    """Memory-map every record of a trace as a structured array (``mode`` 'r' or 'r+')."""
+    columns, header_size, n_rows = read_header(path)
+    dtype = _record_dtype(columns)
+    if n_rows == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, offset=header_size, shape=(n_rows,))
+
+
+class TraceWriter:
+    """
+    Create a trace (or reopen one with ``append=True``) and append records.
+    The record count in the header is updated after every append, so a
+    reader only ever sees complete records.
+    """
+    def __init__(self, path: str, columns: Optional[Sequence[Tuple[str, str]]] = None, append: bool = False):
+        self.path = path
+        if append and os.path.exists(path):
+            existing, self.header_size, self.n_rows = read_header(path)
+            if columns is not None and _record_dtype(columns) != _record_dtype(existing):
+                raise TraceFormatError(f"{path}: column layout does not match")
+            self.columns = existing
+            self.dtype = _record_dtype(existing)
+            self._file = open(path, "r+b")
+            self._file.seek(self.header_size + self.n_rows * self.dtype.itemsize)
+            self._file.truncate()
+            return
+        if not columns:
+            raise ValueError("columns are required to create a trace")
+        self.dtype = _record_dtype(columns)
+        self.columns = [(name, self.dtype[name].str) for name in self.dtype.names]
+        self.header_size = _header_size(len(self.columns))
+        self.n_rows = 0
+        self._file = open(path, "w+b")
+        header = bytearray(self.header_size)
+        _PREAMBLE.pack_into(header, 0, TRACE_MAGIC, TRACE_VERSION, len(self.columns), self.header_size, 0)
+        for i, (name, dtype) in enumerate(self.columns):
+            encoded = name.encode("ascii")
+            if len(encoded) > 24 or len(dtype) > 8:
+                raise ValueError(f"column {name!r} ({dtype}) does not fit the column table")
+            _COLUMN.pack_into(header, _PREAMBLE_SIZE + i * _COLUMN.size, encoded, dtype.encode("ascii"))
+        self._file.write(header)
+
+    def append(self, records: Optional[np.ndarray] = None, **columns) -> int:
+        """Append a structured array, or equal-length column arrays by name; returns rows written."""
+        if records is None:
+            n = len(next(iter(columns.values()))) if columns else 0
+            records = np.empty(n, dtype=self.dtype)
+            for name in self.dtype.names:
+                records[name] = columns[name]
+        else:
+            records = np.asarray(records).astype(self.dtype, copy=False)
+        if not len(records):
+            return 0
+        self._file.write(np.ascontiguousarray(records).tobytes())
+        self.n_rows += len(records)
+        end = self._file.tell()
+        self._file.seek(_NROWS_OFFSET)
+        self._file.write(struct.pack("<Q", self.n_rows))
+        self._file.seek(end)
+        return len(records)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_column(path: str, name: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """Yield zero-copy views of one column, ``chunk_rows`` records at a time."""
+    records = open_trace(path)
+    for start in range(0, len(records), chunk_rows):
+        yield records[name][start:start + chunk_rows]
+
+
+def simulate_trace(
+    chip: PhotonicChip, gas_path: str, out_path: str, column: str = "gas",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS, append: bool = False,
+) -> int:
+    """
+    Run simulate_operation math over the gas column of a trace and write
+    gas/photons/energy_J records to ``out_path``. With ``append`` the
+    results extend an existing output trace. Returns rows written.
+    """
+    written = 0
+    with TraceWriter(out_path, SIMULATION_COLUMNS, append=append) as out:
+        for gas in iter_column(gas_path, column, chunk_rows):
+            photons, energy = chip.simulate_operation_array(gas)
+            written += out.append(gas=gas, photons=photons, energy_J=energy)
+    return written
+
+
+# --- Converters ---
+def _infer_dtype(values) -> str:
+    if all(isinstance(v, (bool, np.bool_)) for v in values):
+        return "|b1"
+    if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values):
+        return "<i8"
+    if all(isinstance(v, (int, float, np.number)) for v in values):
+        return "<f8"
+    width = max(len(str(v).encode("utf-8")) for v in values)
+    return f"|S{max(width, 1)}"
+
+
+def from_table(rows: Sequence[dict], path: str) -> int:
+    """
+    Write a list of dicts (e.g. ENERGY_BUDGET) as a trace. Column types are
+    inferred: ints -> <i8, other numbers -> <f8, anything else -> fixed bytes.
+    """
+    if not rows:
+        raise ValueError("cannot infer columns from an empty table")
+    names = list(rows[0])
+    columns = [(name, _infer_dtype([row[name] for row in rows])) for name in names]
+    data = {}
+    for name, dtype in columns:
+        values = [row[name] for row in rows]
+        if dtype.startswith("|S"):
+            values = [str(v).encode("utf-8") for v in values]
+        data[name] = np.array(values, dtype=dtype)
+    with TraceWriter(path, columns) as out:
+        return out.append(**data)
+
+
+def from_energy_budget(path: str, table: Sequence[dict] = ENERGY_BUDGET) -> int:
+    return from_table(table, path)
+
+
+def from_csv(csv_path: str, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS, dtype: str = "<f8") -> int:
+    """Convert a numeric CSV with a header row into a trace, ``chunk_rows`` lines at a time."""
+    written = 0
+    with open(csv_path, "r", newline="") as src:
+        header = next(csv.reader([src.readline()]))
+        names = [name.strip() for name in header]
+        with TraceWriter(path, [(name, dtype) for name in names]) as out:
+            while True:
+                block = list(itertools.islice(src, chunk_rows))
+                if not block:
+                    break
+                values = np.loadtxt(io.StringIO("".join(block)), delimiter=",", dtype=np.float64, ndmin=2)
+                written += out.append(**{name: values[:, i] for i, name in enumerate(names)})
+    return written
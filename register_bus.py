@@ -0,0 +1,339 @@
+"""
+Asyncio register-bus server and client for emulated PhotonicChip instances.
+
+A RegisterBusServer hosts N PhotonicChip objects and exposes their SPI
+register files (see RegisterFile / SPI_REGISTER_MAP) over TCP or a Unix
+socket. Clients may pipeline any number of request frames; each frame
+carries a batch of register operations for one chip and is answered, in
+order, by one response frame holding the values read. Chips raise
+interrupt notifications to every connection subscribed to them whenever
+their register file fires an interrupt (see ``interrupt_enabled``).
+
+Wire format (little-endian):
+    request   header "<IHH" (request_id, chip, n_ops) + n_ops x "<BBH" (op, addr, value)
+    response  header "<BIHH" (frame type, request_id, chip, n_values) + n_values x "<H"
+Ops are OP_READ, OP_WRITE and OP_SUBSCRIBE. Interrupt frames use type
+FRAME_INTERRUPT, request_id 0, and carry [cause, EMISSION_STATUS].
+
+Usage:
+    server = RegisterBusServer(n_chips=64)
+    await server.start_tcp("127.0.0.1", 7500)
+    pool = await RegisterBusPool.connect_tcp("127.0.0.1", 7500, size=4)
+    await pool.write(3, 0x00, 1)
+    status = await pool.read(3, 0x04)
+"""
+
+import asyncio
+import itertools
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from energy_photon_chip_design import PhotonicChip
+
+OP_READ = 0
+OP_WRITE = 1
+OP_SUBSCRIBE = 2
+
+FRAME_RESPONSE = 0
+FRAME_INTERRUPT = 1
+FRAME_ERROR = 2
+
+# Interrupt causes carried in FRAME_INTERRUPT payloads
+INTERRUPT_CAUSES = {"emission": 1, "error": 2}
+
+ERROR_BAD_CHIP = 1
+ERROR_INTERNAL = 2        # the frame raised on the server (e.g. a value outside "<H")
+
+_REQUEST = struct.Struct("<IHH")
+_OP = struct.Struct("<BBH")
+_RESPONSE = struct.Struct("<BIHH")
+
+_WRITE_HIGH_WATER = 1 << 18
+
+
+class RegisterBusError(RuntimeError):
+    """Raised on the client when the server rejects a request."""
+
+
+def encode_request(request_id: int, chip: int, ops: Sequence[Tuple[int, int, int]]) -> bytes:
+    return _REQUEST.pack(request_id, chip, len(ops)) + b"".join(_OP.pack(*op) for op in ops)
+
+
+def encode_response(frame_type: int, request_id: int, chip: int, values: Sequence[int]) -> bytes:
+    return _RESPONSE.pack(frame_type, request_id, chip, len(values)) + struct.pack(f"<{len(values)}H", *values)
+
+
+# === Server ===
+class RegisterBusServer:
+    """
+    Serve register reads/writes for a set of emulated chips. Chips built
+    here get ``register_trace_capacity`` (access tracing off by default).
+    """
+
+    def __init__(
+        self, n_chips: int = 1, chips: Optional[List[PhotonicChip]] = None, register_trace_capacity: int = 0
+    ):
+        self.chips = chips if chips is not None else [
+            PhotonicChip(register_trace_capacity=register_trace_capacity) for _ in range(n_chips)
+        ]
+        self._subscribers: Dict[int, set] = {}
+        self._congested: set = set()  # Subscribers past the write high-water mark, drained by _handle
+        self._servers = []
+        for index, chip in enumerate(self.chips):
+            chip.registers.interrupt_handler = self._make_interrupt_handler(index)
+
+    def _make_interrupt_handler(self, index: int):
+        def handler(register_file, cause):
+            writers = self._subscribers.get(index)
+            if not writers:
+                return
+            frame = encode_response(
+                FRAME_INTERRUPT, 0, index, (INTERRUPT_CAUSES.get(cause, 0), register_file.status())
+            )
+            for writer in list(writers):
+                if writer.is_closing():
+                    writers.discard(writer)
+                else:
+                    writer.write(frame)
+                    if writer.transport.get_write_buffer_size() > _WRITE_HIGH_WATER:
+                        self._congested.add(writer)
+        return handler
+
+    def execute(self, chip_index: int, ops, writer=None) -> List[int]:
+        """Apply decoded ops to one chip and return the values read."""
+        registers = self.chips[chip_index].registers
+        values = []
+        for op, addr, value in ops:
+            if op == OP_READ:
+                values.append(registers.read(addr))
+            elif op == OP_WRITE:
+                registers.write(addr, value)
+            elif op == OP_SUBSCRIBE and writer is not None:
+                self._subscribers.setdefault(chip_index, set()).add(writer)
+        return values
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        n_chips = len(self.chips)
+        try:
+            while True:
+                header = await reader.readexactly(_REQUEST.size)
+                request_id, chip, n_ops = _REQUEST.unpack(header)
+                body = await reader.readexactly(n_ops * _OP.size) if n_ops else b""
+                if chip >= n_chips:
+                    writer.write(encode_response(FRAME_ERROR, request_id, chip, (ERROR_BAD_CHIP,)))
+                    continue
+                try:
+                    frame = encode_response(
+                        FRAME_RESPONSE, request_id, chip, self.execute(chip, _OP.iter_unpack(body), writer)
+                    )
+                except Exception:
+                    # Ops before the failing one stay applied, as on a real bus
+                    frame = encode_response(FRAME_ERROR, request_id, chip, (ERROR_INTERNAL,))
+                writer.write(frame)
+                if writer.transport.get_write_buffer_size() > _WRITE_HIGH_WATER:
+                    await writer.drain()
+                if self._congested:
+                    # Interrupts raised by this frame back up into the connection that caused them
+                    congested = list(self._congested)
+                    self._congested.clear()
+                    await asyncio.gather(*(w.drain() for w in congested), return_exceptions=True)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for writers in self._subscribers.values():
+                writers.discard(writer)
+            writer.close()
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0):
+        server = await asyncio.start_server(self._handle, host, port)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path: str):
+        server = await asyncio.start_unix_server(self._handle, path)
+        self._servers.append(server)
+        return server
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+
+
+# === Client ===
+class RegisterBusClient:
+    """
+    One pipelined connection. Requests are written immediately and matched
+    to responses by request id, so many can be in flight at once.
+    Interrupt notifications land in ``interrupts`` as (chip, cause, status).
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._lost: Optional[ConnectionError] = None
+        self.interrupts: asyncio.Queue = asyncio.Queue()
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+
+    @classmethod
+    async def connect_tcp(cls, host: str, port: int):
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path: str):
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def _read_loop(self):
+        try:
+            while True:
+                header = await self._reader.readexactly(_RESPONSE.size)
+                frame_type, request_id, chip, count = _RESPONSE.unpack(header)
+                payload = await self._reader.readexactly(2 * count) if count else b""
+                values = list(struct.unpack(f"<{count}H", payload))
+                if frame_type == FRAME_INTERRUPT:
+                    self.interrupts.put_nowait((chip, values[0], values[1]))
+                    continue
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if frame_type == FRAME_ERROR:
+                    future.set_exception(RegisterBusError(f"chip {chip}: error code {values[0]}"))
+                else:
+                    future.set_result(values)
+        except Exception as exc:
+            self._lost = ConnectionError(f"register bus connection lost: {exc!r}")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(*self._lost.args))
+            self._pending.clear()
+
+    def submit(self, chip: int, ops: Sequence[Tuple[int, int, int]]) -> asyncio.Future:
+        """Send one batched frame without waiting; the future resolves to the read values."""
+        if self._reader_task.done():
+            # Nothing would ever resolve the future once the reader has stopped
+            raise ConnectionError(*(self._lost or ConnectionError("register bus client closed")).args)
+        request_id = next(self._ids) & 0xFFFFFFFF
+        frame = encode_request(request_id, chip, ops)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(frame)
+        return future
+
+    async def transact(self, chip: int, ops: Sequence[Tuple[int, Optional[int]]]) -> List[int]:
+        """Same convention as RegisterFile.transact: (addr, value), value None for reads."""
+        encoded = [(OP_READ, addr, 0) if value is None else (OP_WRITE, addr, value) for addr, value in ops]
+        future = self.submit(chip, encoded)
+        await self._writer.drain()
+        return await future
+
+    async def read(self, chip: int, addr: int) -> int:
+        return (await self.transact(chip, [(addr, None)]))[0]
+
+    async def write(self, chip: int, addr: int, value: int):
+        await self.transact(chip, [(addr, value)])
+
+    async def subscribe(self, chip: int):
+        future = self.submit(chip, [(OP_SUBSCRIBE, 0, 0)])
+        await self._writer.drain()
+        await future
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await asyncio.gather(self._reader_task, return_exceptions=True)
+
+
+class RegisterBusPool:
+    """
+    Fixed pool of client connections. Each chip is pinned to one
+    connection (chip % size) so its operations stay ordered; interrupts from
+    every connection are merged into ``interrupts``.
+    """
+
+    def __init__(self, clients: List[RegisterBusClient]):
+        self.clients = clients
+        self.interrupts: asyncio.Queue = asyncio.Queue()
+        self._forwarders = [asyncio.ensure_future(self._forward(c)) for c in clients]
+
+    @classmethod
+    async def connect_tcp(cls, host: str, port: int, size: int = 4):
+        return cls(list(await asyncio.gather(*(RegisterBusClient.connect_tcp(host, port) for _ in range(size)))))
+
+    @classmethod
+    async def connect_unix(cls, path: str, size: int = 4):
+        return cls(list(await asyncio.gather(*(RegisterBusClient.connect_unix(path) for _ in range(size)))))
+
+    async def _forward(self, client: RegisterBusClient):
+        while True:
+            self.interrupts.put_nowait(await client.interrupts.get())
+
+    def client_for(self, chip: int) -> RegisterBusClient:
+        return self.clients[chip % len(self.clients)]
+
+    async def transact(self, chip: int, ops) -> List[int]:
+        return await self.client_for(chip).transact(chip, ops)
+
+    async def read(self, chip: int, addr: int) -> int:
+        return await self.client_for(chip).read(chip, addr)
+
+    async def write(self, chip: int, addr: int, value: int):
+        await self.client_for(chip).write(chip, addr, value)
+
+    async def subscribe(self, chip: int):
+        await self.client_for(chip).subscribe(chip)
+
+    async def close(self):
+        for task in self._forwarders:
+            task.cancel()
+        await asyncio.gather(*(c.close() for c in self.clients))
+
+
+class LocalRegisterBus:
+    """
+    In-process stand-in with the client API, for harnesses that want the
+    async interface without a socket. Interrupts are queued the same way.
+    """
+
+    def __init__(
+        self, n_chips: int = 1, chips: Optional[List[PhotonicChip]] = None, register_trace_capacity: int = 0
+    ):
+        self.chips = chips if chips is not None else [
+            PhotonicChip(register_trace_capacity=register_trace_capacity) for _ in range(n_chips)
+        ]
+        self.interrupts: asyncio.Queue = asyncio.Queue()
+        self._subscribed = set()
+        for index, chip in enumerate(self.chips):
+            chip.registers.interrupt_handler = self._make_interrupt_handler(index)
+
+    def _make_interrupt_handler(self, index: int):
+        def handler(register_file, cause):
+            if index in self._subscribed:
+                self.interrupts.put_nowait((index, INTERRUPT_CAUSES.get(cause, 0), register_file.status()))
+        return handler
+
+    def _registers(self, chip: int):
+        if not 0 <= chip < len(self.chips):
+            raise RegisterBusError(f"chip {chip}: error code {ERROR_BAD_CHIP}")
+        return self.chips[chip].registers
+
+    async def transact(self, chip: int, ops) -> List[int]:
+        return self._registers(chip).transact(ops)
+
+    async def read(self, chip: int, addr: int) -> int:
+        return self._registers(chip).read(addr)
+
+    async def write(self, chip: int, addr: int, value: int):
+        self._registers(chip).write(addr, value)
+
+    async def subscribe(self, chip: int):
+        self._registers(chip)
+        self._subscribed.add(chip)
+
+    async def close(self):
+        pass
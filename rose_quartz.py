@@ -0,0 +1,19 @@
+"""
+Importable alias for RoseQuartz-enriched-upgrade.py.
+
+The dopant-layer model lives in a script whose file name is not a valid
+module name. Importing this module loads that script once and registers
+it under ``rose_quartz``, so other modules (and process-pool workers,
+which unpickle by module name) can use ``from rose_quartz import ...``.
+"""
+
+import importlib.util
+import os
+import sys
+
+_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "RoseQuartz-enriched-upgrade.py")
+
+_spec = importlib.util.spec_from_file_location(__name__, _SOURCE)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
@@ -0,0 +1,287 @@
+"""
+Photonchip Simulation Suite
+Version 1.0
+
+This Python module simulates photonic waveguide behavior on silicon chips,
+mimicking electromagnetic wave propagation and material interactions.
+
+Only NumPy is imported up front. SciPy (effective-index solver) and
+matplotlib (plotting) are imported on first use, and figures can be
+rendered headless to PNG/SVG with render_mode_profiles.
+"""
+
+import math
+import os
+from functools import lru_cache
+
+import numpy as np
+
+# Physical constants (CODATA 2018, as in scipy.constants)
+c = 299_792_458.0           # m/s
+mu_0 = 1.25663706212e-6     # N/A^2
+epsilon_0 = 8.8541878128e-12  # F/m
+
+# Constants
+wavelength = 1.55e-6  # meters
+frequency = c / wavelength
+omega = 2 * np.pi * frequency
+MODE_PROFILE_CACHE_SIZE = 256  # Distinct (width, height, grid_size, dtype) profiles kept
+
+# Define materials
+class Material:
+    def __init__(self, name, n, alpha):
+        self.name = name
+        self.n = n  # Refractive index
+        self.alpha = alpha  # Absorption coefficient (1/m)
+
+# Define waveguide
+class Waveguide:
+    def __init__(self, core, cladding, width, height, length):
+        self.core = core
+        self.cladding = cladding
+        self.width = width
+        self.height = height
+        self.length = length
+
+    def effective_index(self, wavelength_m=None, table=None):
+        """
+        Fundamental quasi-TE effective index by the effective-index method.
+        Looked up in ``table`` (a NeffTable for these materials) when given,
+        otherwise solved directly.
+        """
+        wavelength_m = wavelength if wavelength_m is None else wavelength_m
+        if table is not None:
+            return float(table.lookup([self.width], [self.height], [wavelength_m])[0])
+        return solve_effective_index(self.core.n, self.cladding.n, self.width, self.height, wavelength_m)
+
+    def confinement_factor(self, wavelength_m=None, table=None):
+        """Approximate share of modal power in the core, (neff^2 - n2^2) / (n1^2 - n2^2)."""
+        neff = self.effective_index(wavelength_m, table)
+        n1, n2 = self.core.n, self.cladding.n
+        return (neff ** 2 - n2 ** 2) / (n1 ** 2 - n2 ** 2)
+
+    def propagation_loss(self, wavelength_m=None, table=None):
+        """
+        Core absorption over the length. With a wavelength, absorption is
+        weighted by the confinement factor between core and cladding.
+        """
+        if wavelength_m is None:
+            return self.core.alpha * self.length
+        gamma = self.confinement_factor(wavelength_m, table)
+        return (gamma * self.core.alpha + (1 - gamma) * self.cladding.alpha) * self.length
+
+    def mode_profile_1d(self, grid_size=100, dtype=np.float64):
+        """
+        Gaussian mode profile as 1-D axes plus the (grid_size x grid_size)
+        field, built as an outer product of separable x/y factors. Results
+        are cached by geometry and returned read-only.
+        """
+        return _mode_profile(self.width, self.height, grid_size, np.dtype(dtype).name)
+
+    def mode_profile(self, grid_size=100, dtype=np.float64):
+        x, y, field = self.mode_profile_1d(grid_size, dtype)
+        X, Y = np.meshgrid(x, y)
+        return X, Y, field
+
+@lru_cache(maxsize=MODE_PROFILE_CACHE_SIZE)
+def _mode_profile(width, height, grid_size, dtype_name):
+    x, y, field = mode_profiles_batch([width], [height], grid_size, dtype_name)
+    x, y, field = x[0], y[0], field[0]
+    for array in (x, y, field):
+        array.setflags(write=False)
+    return x, y, field
+
+def mode_profiles_batch(widths, heights, grid_size=100, dtype=np.float64):
+    """
+    Mode profiles for many geometries at once.
+    Returns x (N x G), y (N x G) and field (N x G x G), where
+    field[k] = exp(-(x^2 + y^2) / (w*h/4)) = outer(exp(-y^2/s), exp(-x^2/s)).
+    """
+    dtype = np.dtype(dtype)
+    widths = np.asarray(widths, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+    x = np.linspace(-widths, widths, grid_size, axis=-1)
+    y = np.linspace(-heights, heights, grid_size, axis=-1)
+    inv_spread = (4.0 / (widths * heights))[:, np.newaxis]
+    gx = np.exp(-(x * x) * inv_spread).astype(dtype, copy=False)
+    gy = np.exp(-(y * y) * inv_spread).astype(dtype, copy=False)
+    field = gy[:, :, np.newaxis] * gx[:, np.newaxis, :]
+    return x.astype(dtype, copy=False), y.astype(dtype, copy=False), field
+
+def waveguide_mode_profiles(waveguides, grid_size=100, dtype=np.float64):
+    """Stacked mode profiles for a sequence of Waveguide objects (see mode_profiles_batch)."""
+    return mode_profiles_batch(
+        [wg.width for wg in waveguides], [wg.height for wg in waveguides], grid_size, dtype
+    )
+
+# --- Effective index solver ---
+def slab_effective_index(n_core, n_clad, thickness, wavelength_m, polarization="TE", order=0):
+    """
+    Effective index of a guided mode of a symmetric slab, by root-finding
+    the transcendental dispersion equation
+        kappa * d / 2 = atan(r * gamma / kappa) + order * pi / 2
+    with kappa = k0 sqrt(n1^2 - neff^2), gamma = k0 sqrt(neff^2 - n2^2),
+    and r = 1 (TE) or n1^2 / n2^2 (TM). Returns NaN if the mode is cut off.
+    """
+    from scipy.optimize import brentq
+
+    if n_core <= n_clad:
+        raise ValueError("core index must exceed cladding index")
+    k0 = 2 * np.pi / wavelength_m
+    ratio = 1.0 if polarization == "TE" else (n_core / n_clad) ** 2
+
+    def dispersion(neff):
+        kappa = k0 * math.sqrt(max(n_core ** 2 - neff ** 2, 0.0))
+        gamma = k0 * math.sqrt(max(neff ** 2 - n_clad ** 2, 0.0))
+        return kappa * thickness / 2 - math.atan2(ratio * gamma, kappa) - order * np.pi / 2
+
+    span = n_core - n_clad
+    lo = n_clad + span * 1e-12
+    hi = n_core - span * 1e-12
+    if dispersion(lo) <= 0:
+        return float("nan")
+    return brentq(dispersion, lo, hi, xtol=1e-14, rtol=1e-14)
+
+def solve_effective_index(n_core, n_clad, width, height, wavelength_m):
+    """
+    Effective-index method for a rectangular core: solve the vertical slab
+    (height) for TE, then the lateral slab (width) with that index as the
+    core, for the TM-like boundary condition of a quasi-TE mode.
+    """
+    n_vertical = slab_effective_index(n_core, n_clad, height, wavelength_m, "TE")
+    if not n_vertical > n_clad:
+        return float("nan")
+    return slab_effective_index(n_vertical, n_clad, width, wavelength_m, "TM")
+
+class NeffTable:
+    """
+    Precomputed n_eff over a (width, height, wavelength) grid for one
+    core/cladding pair, linearly interpolated on lookup. Points outside
+    the grid are solved directly. Tables are stored as .npz files.
+    """
+    def __init__(self, n_core, n_clad, widths, heights, wavelengths, values):
+        self.n_core = float(n_core)
+        self.n_clad = float(n_clad)
+        self.widths = np.asarray(widths, dtype=np.float64)
+        self.heights = np.asarray(heights, dtype=np.float64)
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        from scipy.interpolate import RegularGridInterpolator
+        self._interp = RegularGridInterpolator(
+            (self.widths, self.heights, self.wavelengths), self.values, bounds_error=False, fill_value=np.nan
+        )
+
+    @classmethod
+    def build(cls, core, cladding, widths, heights, wavelengths):
+        values = np.empty((len(widths), len(heights), len(wavelengths)))
+        for i, w in enumerate(widths):
+            for j, h in enumerate(heights):
+                for k, lam in enumerate(wavelengths):
+                    values[i, j, k] = solve_effective_index(core.n, cladding.n, w, h, lam)
+        return cls(core.n, cladding.n, widths, heights, wavelengths, values)
+
+    def save(self, path):
+        # Through a file handle so np.savez writes exactly ``path`` (no implicit .npz suffix)
+        with open(path, "wb") as f:
+            np.savez(
+                f, n_core=self.n_core, n_clad=self.n_clad, widths=self.widths,
+                heights=self.heights, wavelengths=self.wavelengths, values=self.values,
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["n_core"], data["n_clad"], data["widths"], data["heights"], data["wavelengths"], data["values"])
+
+    def matches(self, core, cladding, widths, heights, wavelengths):
+        return (
+            self.n_core == core.n and self.n_clad == cladding.n
+            and np.array_equal(self.widths, np.asarray(widths, dtype=np.float64))
+            and np.array_equal(self.heights, np.asarray(heights, dtype=np.float64))
+            and np.array_equal(self.wavelengths, np.asarray(wavelengths, dtype=np.float64))
+        )
+
+    @classmethod
+    def load_or_build(cls, path, core, cladding, widths, heights, wavelengths):
+        """Reuse the table at ``path`` if it was built for the same inputs; otherwise build and save it."""
+        if os.path.exists(path):
+            table = cls.load(path)
+            if table.matches(core, cladding, widths, heights, wavelengths):
+                return table
+        table = cls.build(core, cladding, widths, heights, wavelengths)
+        table.save(path)
+        return table
+
+    def lookup(self, widths, heights, wavelengths):
+        """Interpolated n_eff for arrays of (width, height, wavelength); they broadcast together."""
+        w, h, lam = np.broadcast_arrays(
+            np.asarray(widths, dtype=np.float64), np.asarray(heights, dtype=np.float64),
+            np.asarray(wavelengths, dtype=np.float64),
+        )
+        out = self._interp(np.stack((w.ravel(), h.ravel(), lam.ravel()), axis=-1))
+        for idx in np.flatnonzero(np.isnan(out)):
+            out[idx] = solve_effective_index(self.n_core, self.n_clad, w.flat[idx], h.flat[idx], lam.flat[idx])
+        return out.reshape(w.shape)
+
+# --- Plotting ---
+def _draw_mode_profile(ax, wg, grid_size=100):
+    x, y, field = wg.mode_profile_1d(grid_size)
+    contours = ax.contourf(x * 1e6, y * 1e6, field, levels=50, cmap="inferno")
+    ax.set_title("Mode Profile")
+    ax.set_xlabel("x (µm)")
+    ax.set_ylabel("y (µm)")
+    ax.axis("equal")
+    return contours
+
+def save_mode_profile(wg, path, fmt=None, grid_size=100, dpi=100):
+    """
+    Render one mode profile headless (Agg canvas, no pyplot or display)
+    and write it to ``path``; the format follows the extension unless given.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    fig.colorbar(_draw_mode_profile(ax, wg, grid_size), ax=ax, label="Field Intensity")
+    fig.savefig(path, format=fmt, dpi=dpi)
+    return path
+
+def render_mode_profiles(waveguides, out_dir, fmt="png", grid_size=100, prefix="mode_profile", dpi=100):
+    """Headless batch rendering: one PNG/SVG per waveguide in ``out_dir``. Returns the written paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    return [
+        save_mode_profile(wg, os.path.join(out_dir, f"{prefix}_{index:05d}.{fmt}"), fmt, grid_size, dpi)
+        for index, wg in enumerate(waveguides)
+    ]
+
+# Define simulation function
+def simulate_waveguide(wg: Waveguide, output=None):
+    """Print the waveguide figures and plot its mode profile; with ``output`` the plot is saved headless instead of shown."""
+    neff = wg.effective_index()
+    loss = wg.propagation_loss()
+    print(f"Simulating waveguide with:")
+    print(f" - Effective Index (neff): {neff:.4f}")
+    print(f" - Propagation Loss: {loss:.4f} dB")
+
+    if output is not None:
+        save_mode_profile(wg, output)
+        return
+
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    fig.colorbar(_draw_mode_profile(ax, wg), ax=ax, label="Field Intensity")
+    plt.show()
+
+def main():
+    silicon = Material("Silicon", n=3.48, alpha=0.5)
+    sio2 = Material("SiO2", n=1.44, alpha=0.1)
+
+    wg = Waveguide(core=silicon, cladding=sio2, width=0.5e-6, height=0.22e-6, length=2e-3)
+    simulate_waveguide(wg)
+
+# Example usage
+if __name__ == "__main__":
+    main()